@@ -0,0 +1,25 @@
+"""搜索引擎工具包
+
+以包的形式使用（各模块之间为相对导入），例如把本目录放到项目中作为 app/utils/search：
+
+    from app.utils.search import SearchEngineFactory, SearchEngineType
+"""
+from .search_factory import (
+    FederatedSearchEngine,
+    JinaSearchEngine,
+    SearchEngine,
+    SearchEngineFactory,
+    SearchEngineType,
+    TavilySearchEngine,
+)
+from .search_hit import SearchHit
+
+__all__ = [
+    "FederatedSearchEngine",
+    "JinaSearchEngine",
+    "SearchEngine",
+    "SearchEngineFactory",
+    "SearchEngineType",
+    "SearchHit",
+    "TavilySearchEngine",
+]
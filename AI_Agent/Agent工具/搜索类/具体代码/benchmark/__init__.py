@@ -0,0 +1 @@
+"""搜索引擎压测工具：本地模拟服务 + 吞吐量/延迟测量"""
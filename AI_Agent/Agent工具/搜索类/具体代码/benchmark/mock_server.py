@@ -0,0 +1,164 @@
+"""本地模拟搜索服务：返回与 Tavily / Jina 相同结构的响应，用于压测而不消耗API额度
+
+路由：
+    POST /tavily/search   Tavily 搜索
+    POST /jina/search     Jina 搜索
+    POST /jina/reader     Jina Reader
+    POST /jina/rerank     Jina 重排序
+"""
+from __future__ import annotations
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+
+
+@dataclass
+class MockConfig:
+    """模拟服务的延迟与错误分布
+
+    Attributes:
+        latency_ms: 延迟中位数（毫秒），按对数正态分布采样
+        latency_sigma: 对数正态分布的 sigma，越大长尾越明显
+        error_rate: 返回 500 的概率
+        rate_limit_rate: 返回 429（带 Retry-After）的概率
+        retry_after: 429 响应中的 Retry-After（秒）
+        results_per_query: 每次搜索返回的结果数
+    """
+    latency_ms: float = 50.0
+    latency_sigma: float = 0.5
+    error_rate: float = 0.0
+    rate_limit_rate: float = 0.0
+    retry_after: float = 0.1
+    results_per_query: int = 5
+
+
+def _search_items(query: str, count: int) -> list:
+    return [
+        {
+            "title": f"{query} - 结果 {i}",
+            "url": f"https://example.com/{abs(hash(query)) % 100000}/{i}",
+            "content": f"关于 {query} 的第 {i} 条内容摘要。" * 3,
+            "score": round(1.0 - i / (count + 1), 4),
+        }
+        for i in range(count)
+    ]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # 响应头和正文分两次写出，关闭Nagle避免与延迟ACK叠加出约40ms的额外延迟
+    disable_nagle_algorithm = True
+    server: "MockSearchServer"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def _send(self, status: int, body: Optional[Dict[str, Any]] = None, headers: Optional[Dict[str, str]] = None) -> None:
+        data = json.dumps(body or {}, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        config = self.server.config
+        self.server.record(self.path)
+
+        time.sleep(random.lognormvariate(0, config.latency_sigma) * config.latency_ms / 1000.0)
+        roll = random.random()
+        if roll < config.rate_limit_rate:
+            self._send(429, {"detail": "rate limited"}, {"Retry-After": str(config.retry_after)})
+            return
+        if roll < config.rate_limit_rate + config.error_rate:
+            self._send(500, {"detail": "internal error"})
+            return
+
+        if self.path == "/tavily/search":
+            query = payload.get("query", "")
+            self._send(200, {
+                "query": query,
+                "follow_up_questions": None,
+                "answer": None,
+                "images": [],
+                "results": _search_items(query, config.results_per_query),
+                "response_time": config.latency_ms / 1000.0,
+            })
+        elif self.path == "/jina/search":
+            items = _search_items(payload.get("q", ""), config.results_per_query)
+            self._send(200, {"code": 200, "data": [
+                {"title": item["title"], "url": item["url"], "description": item["content"], "content": item["content"] * 5}
+                for item in items
+            ]})
+        elif self.path == "/jina/reader":
+            url = payload.get("url", "")
+            self._send(200, {"code": 200, "data": {"url": url, "title": url, "content": f"{url} 的页面正文。" * 50}})
+        elif self.path == "/jina/rerank":
+            documents = payload.get("documents", [])
+            order = sorted(range(len(documents)), key=lambda i: random.random())
+            top_n = payload.get("top_n") or len(documents)
+            self._send(200, {"model": payload.get("model"), "results": [
+                {"index": i, "relevance_score": round(random.random(), 4), "document": {"text": documents[i]}}
+                for i in order[:top_n]
+            ]})
+        else:
+            self._send(404, {"detail": "not found"})
+
+
+class MockSearchServer(ThreadingHTTPServer):
+    """多线程模拟服务，在后台线程中运行"""
+
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, config: Optional[MockConfig] = None, host: str = "127.0.0.1", port: int = 0):
+        """初始化模拟服务
+
+        Args:
+            config: 延迟与错误分布配置
+            host: 监听地址
+            port: 监听端口，0 表示自动分配
+        """
+        super().__init__((host, port), _Handler)
+        self.config = config or MockConfig()
+        self._lock = threading.Lock()
+        self.requests: Dict[str, int] = {}
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def record(self, path: str) -> None:
+        with self._lock:
+            self.requests[path] = self.requests.get(path, 0) + 1
+
+    def start(self) -> "MockSearchServer":
+        """在后台线程中启动服务"""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """停止服务"""
+        self.shutdown()
+        self.server_close()
+
+
+if __name__ == "__main__":
+    server = MockSearchServer(port=8765).start()
+    print(f"模拟搜索服务已启动: {server.base_url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
@@ -0,0 +1,186 @@
+"""搜索引擎压测：在本地模拟服务上测量各方法的吞吐量和 p50/p95/p99 延迟
+
+用法示例：
+    python benchmark/run_benchmark.py --concurrency 1 8 32 --requests 200
+    python benchmark/run_benchmark.py --latency-ms 80 --error-rate 0.02 --rate-limit-rate 0.05 --json result.json
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List
+
+if not __package__:
+    # 直接以脚本运行时，把搜索包的上级目录加入路径，按包导入
+    _package_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    sys.path.insert(0, os.path.dirname(_package_dir))
+    __package__ = f"{os.path.basename(_package_dir)}.benchmark"
+
+from ..search_factory import SearchEngineFactory, SearchEngineType  # noqa: E402
+from .mock_server import MockConfig, MockSearchServer  # noqa: E402
+
+_counter = itertools.count()
+
+
+def _unique_query(prefix: str) -> str:
+    """每次生成不同的查询，避免缓存和在途请求合并影响测量"""
+    return f"{prefix} {next(_counter)}"
+
+
+def percentile(samples: List[float], p: float) -> float:
+    """最近秩法计算百分位数"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, int(round(p / 100.0 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def summarize(name: str, concurrency: int, latencies: List[float], errors: int, elapsed: float, units_per_op: int = 1) -> Dict[str, Any]:
+    """汇总一次测量的结果（延迟单位为毫秒）"""
+    ops = len(latencies)
+    return {
+        "method": name,
+        "concurrency": concurrency,
+        "ops": ops,
+        "errors": errors,
+        "ops_per_sec": ops / elapsed if elapsed > 0 else 0.0,
+        "queries_per_sec": ops * units_per_op / elapsed if elapsed > 0 else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+def _has_error(result: Any) -> bool:
+    if isinstance(result, dict):
+        return "error" in result
+    if isinstance(result, list):
+        return any(_has_error(item) for item in result)
+    return False
+
+
+def run_threaded(name: str, op: Callable[[], Any], concurrency: int, total: int, units_per_op: int = 1) -> Dict[str, Any]:
+    """用线程池并发执行同步操作"""
+    def _timed(_: int) -> tuple:
+        start = time.perf_counter()
+        result = op()
+        return time.perf_counter() - start, _has_error(result)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        samples = list(pool.map(_timed, range(total)))
+    elapsed = time.perf_counter() - start
+    return summarize(name, concurrency, [s[0] for s in samples], sum(s[1] for s in samples), elapsed, units_per_op)
+
+
+def run_async(name: str, op: Callable[[], Any], concurrency: int, total: int, units_per_op: int = 1, parallel_ops: int = None) -> Dict[str, Any]:
+    """在事件循环中执行异步操作，最多 parallel_ops（默认为 concurrency）个操作同时进行"""
+    async def _main() -> tuple:
+        semaphore = asyncio.Semaphore(parallel_ops or concurrency)
+
+        async def _timed() -> tuple:
+            async with semaphore:
+                start = time.perf_counter()
+                result = await op()
+                return time.perf_counter() - start, _has_error(result)
+
+        start = time.perf_counter()
+        samples = await asyncio.gather(*[_timed() for _ in range(total)])
+        return samples, time.perf_counter() - start
+
+    samples, elapsed = asyncio.run(_main())
+    return summarize(name, concurrency, [s[0] for s in samples], sum(s[1] for s in samples), elapsed, units_per_op)
+
+
+def build_engines(base_url: str, resilience: bool) -> tuple:
+    """创建指向模拟服务的 Tavily 和 Jina 引擎（不启用缓存，不限流也不消耗真实的月度额度）"""
+    tavily = SearchEngineFactory.create_engine(SearchEngineType.TAVILY, api_key="benchmark", rate_limiter=False, resilience=resilience)
+    tavily.search_url = f"{base_url}/tavily/search"
+    jina = SearchEngineFactory.create_engine(SearchEngineType.JINA, api_key="benchmark", rate_limiter=False, resilience=resilience)
+    jina.search_url = f"{base_url}/jina/search"
+    jina.reader_url = f"{base_url}/jina/reader"
+    jina.rerank_url = f"{base_url}/jina/rerank"
+    return tavily, jina
+
+
+def run_suite(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    """按并发级别依次测量各个方法"""
+    config = MockConfig(
+        latency_ms=args.latency_ms,
+        latency_sigma=args.latency_sigma,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+    )
+    server = MockSearchServer(config).start()
+    tavily, jina = build_engines(server.base_url, resilience=not args.no_resilience)
+    subqueries = args.subqueries
+    rows = []
+    try:
+        for concurrency in args.concurrency:
+            total = args.requests
+            rows.append(run_threaded(
+                "tavily.search", lambda: tavily.search(_unique_query("tavily")), concurrency, total))
+            rows.append(run_threaded(
+                "tavily.search_with_subqueries",
+                lambda: tavily.search_with_subqueries([_unique_query("sub") for _ in range(subqueries)]),
+                concurrency, max(1, total // subqueries), subqueries))
+            # search_async 自身负责并发，这里每次提交一批查询，逐批测量
+            rows.append(run_async(
+                "tavily.search_async",
+                lambda: tavily.search_async([_unique_query("batch") for _ in range(concurrency)], max_concurrency=concurrency),
+                concurrency, max(1, total // concurrency), concurrency, parallel_ops=1))
+            rows.append(run_async(
+                "jina.search_async",
+                lambda: jina.search_async([_unique_query("batch") for _ in range(concurrency)], max_concurrency=concurrency),
+                concurrency, max(1, total // concurrency), concurrency, parallel_ops=1))
+            rows.append(run_threaded(
+                "jina.deep_search", lambda: jina.deep_search(_unique_query("deep")), concurrency, max(1, total // 2)))
+    finally:
+        server.stop()
+    rows.append({"method": "mock_server.requests", **server.requests})
+    return rows
+
+
+def print_table(rows: List[Dict[str, Any]]) -> None:
+    header = f"{'method':<32}{'conc':>6}{'ops':>7}{'err':>6}{'ops/s':>10}{'q/s':>10}{'p50ms':>9}{'p95ms':>9}{'p99ms':>9}"
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        if "concurrency" not in row:
+            continue
+        print(f"{row['method']:<32}{row['concurrency']:>6}{row['ops']:>7}{row['errors']:>6}"
+              f"{row['ops_per_sec']:>10.1f}{row['queries_per_sec']:>10.1f}"
+              f"{row['p50_ms']:>9.1f}{row['p95_ms']:>9.1f}{row['p99_ms']:>9.1f}")
+
+
+def parse_args(argv: List[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="搜索引擎压测（本地模拟服务，不消耗API额度）")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32], help="并发级别")
+    parser.add_argument("--requests", type=int, default=100, help="每个并发级别的请求数")
+    parser.add_argument("--subqueries", type=int, default=4, help="search_with_subqueries 每次的子查询数")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="模拟延迟中位数（毫秒）")
+    parser.add_argument("--latency-sigma", type=float, default=0.5, help="延迟对数正态分布的 sigma")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="返回 500 的概率")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="返回 429 的概率")
+    parser.add_argument("--no-resilience", action="store_true", help="关闭重试与熔断")
+    parser.add_argument("--json", help="把结果写入JSON文件")
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str] = None) -> None:
+    args = parse_args(argv)
+    rows = run_suite(args)
+    print_table(rows)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(rows, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+from __future__ import annotations
+import hashlib
+import json
+import mmap
+import os
+import sqlite3
+import struct
+import threading
+import time
+import zlib
+from typing import Any, Dict, List, Optional
+
+from .search_cache import normalize_query
+from .search_dedup import canonical_url, extract_hits
+from .search_hit import json_loads
+
+_HEADER = struct.Struct(">I")
+
+
+class _Codec:
+    """段文件压缩编解码：优先 zstd（需要安装 zstandard），否则退回 zlib"""
+
+    def __init__(self, name: str, level: int):
+        self.name = name
+        self.level = level
+        if name == "zst":
+            import zstandard
+
+            self._compressor = zstandard.ZstdCompressor(level=level)
+            self._decompressor = zstandard.ZstdDecompressor()
+
+    def compress(self, data: bytes) -> bytes:
+        if self.name == "zst":
+            return self._compressor.compress(data)
+        return zlib.compress(data, self.level)
+
+    def decompress(self, data: bytes) -> bytes:
+        if self.name == "zst":
+            return self._decompressor.decompress(data)
+        return zlib.decompress(data)
+
+
+def _default_codec() -> str:
+    try:
+        import zstandard  # noqa: F401
+        return "zst"
+    except ImportError:
+        return "zlib"
+
+
+def query_hash(query: str) -> str:
+    """规范化查询的哈希，用于按查询检索"""
+    return hashlib.sha256(normalize_query(query).encode("utf-8")).hexdigest()
+
+
+class SearchArchive:
+    """搜索结果归档：只追加的压缩段文件 + SQLite索引 + 内存映射读取
+
+    - 每条记录单独压缩后追加到当前段文件（格式：4字节长度 + 压缩数据），段超过上限后换新文件
+    - 索引记录 查询哈希 / 引擎 / 时间 / 结果URL 到 (段, 偏移, 长度) 的映射
+    - 读取时对段文件做内存映射，按偏移直接解压单条记录，不需要解析整个文件
+    """
+
+    def __init__(self, directory: str, segment_max_bytes: int = 64 * 1024 * 1024, level: int = 3, codec: Optional[str] = None):
+        """初始化归档
+
+        Args:
+            directory: 归档目录
+            segment_max_bytes: 单个段文件的最大字节数
+            level: 压缩级别
+            codec: "zst" 或 "zlib"，为None时有 zstandard 则用 zstd
+        """
+        self.directory = directory
+        self.segment_max_bytes = segment_max_bytes
+        self.level = level
+        self.codec_name = codec or _default_codec()
+        self._codecs: Dict[str, _Codec] = {}
+        self._lock = threading.Lock()
+        self._maps: Dict[str, mmap.mmap] = {}
+        self._files: Dict[str, Any] = {}
+        os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(os.path.join(directory, "index.sqlite3"), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """CREATE TABLE IF NOT EXISTS records (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                query_hash TEXT NOT NULL,
+                query TEXT NOT NULL,
+                engine TEXT NOT NULL,
+                method TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                segment TEXT NOT NULL,
+                offset INTEGER NOT NULL,
+                length INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_records_query ON records(query_hash, created_at);
+            CREATE INDEX IF NOT EXISTS idx_records_created ON records(created_at);
+            CREATE TABLE IF NOT EXISTS record_urls (
+                record_id INTEGER NOT NULL,
+                url TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_record_urls_url ON record_urls(url);"""
+        )
+        self._conn.commit()
+        self._segment = self._current_segment()
+
+    def _codec(self, segment: str) -> _Codec:
+        name = segment.rsplit(".", 1)[-1]
+        codec = self._codecs.get(name)
+        if codec is None:
+            codec = self._codecs[name] = _Codec(name, self.level)
+        return codec
+
+    def _current_segment(self) -> str:
+        """找到最新的可写段文件，没有或已写满时创建新段"""
+        segments = sorted(name for name in os.listdir(self.directory) if name.startswith("segment-"))
+        if segments:
+            last = segments[-1]
+            if last.endswith(f".{self.codec_name}") and os.path.getsize(os.path.join(self.directory, last)) < self.segment_max_bytes:
+                return last
+            number = int(last.split("-")[1].split(".")[0]) + 1
+        else:
+            number = 1
+        return f"segment-{number:06d}.{self.codec_name}"
+
+    def write(self, engine: str, query: str, result: Dict[str, Any], method: str = "search") -> int:
+        """追加一条搜索结果
+
+        Args:
+            engine: 引擎名称
+            query: 查询字符串
+            result: 搜索结果字典
+            method: 方法名称
+
+        Returns:
+            记录ID
+        """
+        created_at = time.time()
+        record = {"engine": engine, "method": method, "query": query, "created_at": created_at, "result": result}
+        raw = json.dumps(record, ensure_ascii=False, default=str).encode("utf-8")
+        urls = {canonical_url(hit["url"]) for hit in extract_hits(result, engine=engine)}
+        with self._lock:
+            path = os.path.join(self.directory, self._segment)
+            if os.path.exists(path) and os.path.getsize(path) >= self.segment_max_bytes:
+                full = self._files.pop(self._segment, None)
+                if full is not None:
+                    full.close()
+                self._segment = self._current_segment()
+                path = os.path.join(self.directory, self._segment)
+            data = self._codec(self._segment).compress(raw)
+            handle = self._files.get(self._segment)
+            if handle is None:
+                handle = self._files[self._segment] = open(path, "ab")
+            offset = handle.tell() + _HEADER.size
+            handle.write(_HEADER.pack(len(data)) + data)
+            handle.flush()
+            cursor = self._conn.execute(
+                "INSERT INTO records (query_hash, query, engine, method, created_at, segment, offset, length) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (query_hash(query), query, engine, method, created_at, self._segment, offset, len(data)),
+            )
+            record_id = cursor.lastrowid
+            self._conn.executemany(
+                "INSERT INTO record_urls (record_id, url) VALUES (?, ?)", [(record_id, url) for url in urls]
+            )
+            self._conn.commit()
+        return record_id
+
+    def _read(self, segment: str, offset: int, length: int) -> Dict[str, Any]:
+        """通过内存映射读取并解压一条记录"""
+        with self._lock:
+            mapped = self._maps.get(segment)
+            if mapped is None or offset + length > len(mapped):
+                if mapped is not None:
+                    mapped.close()
+                with open(os.path.join(self.directory, segment), "rb") as f:
+                    mapped = self._maps[segment] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            data = mapped[offset:offset + length]
+        return json_loads(self._codec(segment).decompress(data))
+
+    def get(self, record_id: int) -> Optional[Dict[str, Any]]:
+        """按记录ID读取
+
+        Returns:
+            {"id", "engine", "method", "query", "created_at", "result"}，不存在时返回None
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT segment, offset, length FROM records WHERE id = ?", (record_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"id": record_id, **self._read(*row)}
+
+    def find(self,
+             query: Optional[str] = None,
+             url: Optional[str] = None,
+             engine: Optional[str] = None,
+             since: Optional[float] = None,
+             until: Optional[float] = None,
+             limit: int = 20,
+             with_result: bool = True) -> List[Dict[str, Any]]:
+        """按查询、结果URL、引擎和时间范围检索，最新的记录在前
+
+        Args:
+            query: 查询字符串（规范化后精确匹配）
+            url: 结果中包含的URL（规范化后匹配）
+            engine: 引擎名称
+            since: 起始时间戳
+            until: 结束时间戳
+            limit: 最多返回的记录数
+            with_result: 是否读取并返回完整结果
+
+        Returns:
+            记录列表
+        """
+        sql = "SELECT DISTINCT r.id, r.engine, r.method, r.query, r.created_at, r.segment, r.offset, r.length FROM records r"
+        conditions, params = [], []
+        if url is not None:
+            sql += " JOIN record_urls u ON u.record_id = r.id"
+            conditions.append("u.url = ?")
+            params.append(canonical_url(url))
+        if query is not None:
+            conditions.append("r.query_hash = ?")
+            params.append(query_hash(query))
+        if engine is not None:
+            conditions.append("r.engine = ?")
+            params.append(engine)
+        if since is not None:
+            conditions.append("r.created_at >= ?")
+            params.append(since)
+        if until is not None:
+            conditions.append("r.created_at <= ?")
+            params.append(until)
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY r.created_at DESC LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+
+        records = []
+        for record_id, engine_name, method, query_text, created_at, segment, offset, length in rows:
+            record = {"id": record_id, "engine": engine_name, "method": method, "query": query_text, "created_at": created_at}
+            if with_result:
+                record["result"] = self._read(segment, offset, length)["result"]
+            records.append(record)
+        return records
+
+    def latest(self, query: str, engine: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """获取某个查询最近一次的结果，没有时返回None"""
+        records = self.find(query=query, engine=engine, limit=1)
+        return records[0]["result"] if records else None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取记录数和磁盘占用"""
+        with self._lock:
+            count = self._conn.execute("SELECT COUNT(*) FROM records").fetchone()[0]
+        segments = [name for name in os.listdir(self.directory) if name.startswith("segment-")]
+        size = sum(os.path.getsize(os.path.join(self.directory, name)) for name in segments)
+        return {"records": count, "segments": len(segments), "bytes_on_disk": size, "codec": self.codec_name}
+
+    def close(self) -> None:
+        """关闭文件句柄、内存映射和索引"""
+        with self._lock:
+            for handle in self._files.values():
+                handle.close()
+            for mapped in self._maps.values():
+                mapped.close()
+            self._files.clear()
+            self._maps.clear()
+            self._conn.close()
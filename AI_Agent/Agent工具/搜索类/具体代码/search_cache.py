@@ -0,0 +1,236 @@
+from __future__ import annotations
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from .search_hit import json_loads
+
+
+def normalize_query(query: str) -> str:
+    """规范化查询字符串：去除首尾空白、合并连续空白并统一大小写"""
+    return " ".join(str(query).split()).casefold()
+
+
+class SearchCache:
+    """搜索结果缓存：内存LRU + SQLite持久化
+
+    - 缓存键由 引擎名 + 方法名 + 规范化查询 + 选项 组成
+    - 每个引擎可以单独配置TTL（秒），未配置时使用 default_ttl
+    - 内存层和磁盘层都有条目上限，超出后按最近最少使用淘汰
+    - 过期条目在磁盘上再保留 stale_ttl 秒，限流时可以作为降级结果返回
+    """
+
+    def __init__(self,
+                 path: Optional[str] = None,
+                 default_ttl: float = 3600,
+                 engine_ttls: Optional[Dict[str, float]] = None,
+                 max_memory_entries: int = 512,
+                 max_disk_entries: int = 20000,
+                 stale_ttl: float = 7 * 24 * 3600):
+        """初始化搜索缓存
+
+        Args:
+            path: SQLite数据库文件路径，为None时只使用内存缓存
+            default_ttl: 默认过期时间（秒）
+            engine_ttls: 按引擎名配置的过期时间，例如 {"tavily": 86400, "jina": 3600}
+            max_memory_entries: 内存LRU的最大条目数
+            max_disk_entries: 磁盘缓存的最大条目数
+            stale_ttl: 过期条目保留用于降级读取的时间（秒）
+        """
+        self.default_ttl = default_ttl
+        self.engine_ttls = dict(engine_ttls or {})
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.stale_ttl = stale_ttl
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.RLock()
+        self.stats = {
+            "hits": 0,
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "stale_hits": 0,
+            "sets": 0,
+            "evictions": 0,
+        }
+
+        self._conn = None
+        if path:
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS search_cache (
+                    key TEXT PRIMARY KEY,
+                    engine TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    expires_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )"""
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_search_cache_accessed ON search_cache(accessed_at)"
+            )
+            self._conn.commit()
+
+    @staticmethod
+    def make_key(engine: str, method: str, query: str, options: Optional[Dict[str, Any]] = None) -> str:
+        """生成缓存键
+
+        Args:
+            engine: 引擎名称
+            method: 方法名称，例如 "search"、"search_with_site"
+            query: 原始查询字符串
+            options: 影响结果的其他参数
+
+        Returns:
+            缓存键（sha256十六进制字符串）
+        """
+        raw = json.dumps(
+            [engine, method, normalize_query(query), options or {}],
+            ensure_ascii=False,
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def ttl_for(self, engine: str) -> float:
+        """获取指定引擎的过期时间"""
+        return self.engine_ttls.get(engine, self.default_ttl)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """读取缓存，未命中或已过期时返回None"""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self.stats["hits"] += 1
+                    self.stats["memory_hits"] += 1
+                    return value
+                if self._conn is not None:
+                    # 磁盘上保留过期条目，供 get_stale 降级读取
+                    del self._memory[key]
+
+            if self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT value, expires_at FROM search_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    value_json, expires_at = row
+                    if expires_at > now:
+                        self._conn.execute(
+                            "UPDATE search_cache SET accessed_at = ? WHERE key = ?", (now, key)
+                        )
+                        self._conn.commit()
+                        value = json_loads(value_json)
+                        self._remember(key, value, expires_at)
+                        self.stats["hits"] += 1
+                        self.stats["disk_hits"] += 1
+                        return value
+
+            self.stats["misses"] += 1
+            return None
+
+    def get_stale(self, key: str) -> Optional[Dict[str, Any]]:
+        """读取缓存，忽略过期时间（用于限流或故障时的降级）
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            缓存的结果，不存在时返回None
+        """
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self.stats["stale_hits"] += 1
+                return entry[0]
+            if self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT value FROM search_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    self.stats["stale_hits"] += 1
+                    return json_loads(row[0])
+            return None
+
+    def set(self, key: str, value: Dict[str, Any], engine: str = "", ttl: Optional[float] = None) -> None:
+        """写入缓存
+
+        Args:
+            key: 缓存键
+            value: 搜索结果（需要可JSON序列化）
+            engine: 引擎名称，用于选择TTL
+            ttl: 显式指定的过期时间（秒），优先于引擎配置
+        """
+        now = time.time()
+        expires_at = now + (ttl if ttl is not None else self.ttl_for(engine))
+        with self._lock:
+            self._remember(key, value, expires_at)
+            self.stats["sets"] += 1
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO search_cache (key, engine, value, expires_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, engine, json.dumps(value, ensure_ascii=False, default=str), expires_at, now),
+                )
+                self._evict_disk()
+                self._conn.commit()
+
+    def _remember(self, key: str, value: Dict[str, Any], expires_at: float) -> None:
+        """写入内存LRU，超出上限时淘汰最久未使用的条目"""
+        self._memory[key] = (value, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def _evict_disk(self) -> None:
+        """清理超过降级保留期的条目，并在超出上限时按最近访问时间淘汰"""
+        self._conn.execute("DELETE FROM search_cache WHERE expires_at <= ?", (time.time() - self.stale_ttl,))
+        count = self._conn.execute("SELECT COUNT(*) FROM search_cache").fetchone()[0]
+        overflow = count - self.max_disk_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM search_cache WHERE key IN "
+                "(SELECT key FROM search_cache ORDER BY accessed_at ASC LIMIT ?)",
+                (overflow,),
+            )
+            self.stats["evictions"] += overflow
+
+    def clear(self) -> None:
+        """清空内存和磁盘缓存"""
+        with self._lock:
+            self._memory.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM search_cache")
+                self._conn.commit()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取命中/未命中统计信息"""
+        with self._lock:
+            stats = dict(self.stats)
+            lookups = stats["hits"] + stats["misses"]
+            stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+            stats["memory_entries"] = len(self._memory)
+            if self._conn is not None:
+                stats["disk_entries"] = self._conn.execute(
+                    "SELECT COUNT(*) FROM search_cache"
+                ).fetchone()[0]
+            return stats
+
+    def close(self) -> None:
+        """关闭数据库连接"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
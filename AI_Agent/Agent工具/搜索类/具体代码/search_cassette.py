@@ -0,0 +1,226 @@
+from __future__ import annotations
+import asyncio
+import atexit
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Union
+
+from .search_hit import json_loads
+
+# 不参与匹配、也不写入磁带的请求头（密钥等）
+_SECRET_HEADERS = {"authorization", "x-api-key", "api-key"}
+
+
+class CassetteMiss(Exception):
+    """回放模式下磁带中没有对应的请求"""
+
+
+class _RecordedResponse:
+    """回放HTTP错误时使用的响应对象，提供 status_code 和 headers 供重试/熔断判断"""
+
+    def __init__(self, status_code: int, headers: Optional[Dict[str, str]] = None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class CassetteHTTPError(Exception):
+    """回放录制时的HTTP错误"""
+
+    def __init__(self, message: str, status_code: int, headers: Optional[Dict[str, str]] = None):
+        super().__init__(message)
+        self.response = _RecordedResponse(status_code, headers)
+
+
+class Cassette:
+    """请求录制/回放磁带（gzip压缩的JSONL文件）
+
+    - record: 真实请求的响应（含HTTP错误状态码和耗时）逐条追加到磁带
+    - replay: 按 URL + 请求头（不含密钥） + 请求体 匹配录制的响应，不访问网络；
+      同一请求录制了多次时按录制顺序循环返回
+    """
+
+    def __init__(self, path: str, mode: str = "replay", latency: Union[str, float, None] = "recorded"):
+        """初始化磁带
+
+        Args:
+            path: 磁带文件路径（.jsonl.gz）
+            mode: "record" 或 "replay"
+            latency: 回放延迟，"recorded" 使用录制时的耗时，数字为固定秒数，None 表示不延迟
+        """
+        if mode not in ("record", "replay"):
+            raise ValueError(f"不支持的磁带模式: {mode}")
+        self.path = path
+        self.mode = mode
+        self.latency = latency
+        self._lock = threading.Lock()
+        self._entries: Dict[str, List[Dict[str, Any]]] = {}
+        self._cursors: Dict[str, int] = {}
+        self._writer = None
+        self.stats = {"recorded": 0, "replayed": 0, "misses": 0}
+        if mode == "replay":
+            self._load()
+        else:
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+            self._writer = gzip.open(path, "at", encoding="utf-8")
+            atexit.register(self.close)
+
+    @staticmethod
+    def make_key(url: str, headers: Optional[Dict[str, str]], payload: Any) -> str:
+        """生成请求的匹配键"""
+        visible = {k.lower(): v for k, v in (headers or {}).items() if k.lower() not in _SECRET_HEADERS}
+        raw = json.dumps([url, visible, payload], ensure_ascii=False, sort_keys=True, default=str)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            raise FileNotFoundError(f"磁带文件不存在: {self.path}")
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json_loads(line)
+                    self._entries.setdefault(entry["key"], []).append(entry)
+
+    def record(self, key: str, url: str, elapsed: float, response: Any = None,
+               status_code: Optional[int] = None, headers: Optional[Dict[str, str]] = None) -> None:
+        """追加一条录制记录
+
+        Args:
+            key: 匹配键
+            url: 请求地址
+            elapsed: 请求耗时（秒）
+            response: 成功时的响应JSON
+            status_code: HTTP错误时的状态码
+            headers: HTTP错误时需要保留的响应头（如 Retry-After）
+        """
+        entry = {"key": key, "url": url, "elapsed": round(elapsed, 4)}
+        if status_code is not None:
+            entry.update({"status_code": status_code, "headers": headers or {}})
+        else:
+            entry["response"] = response
+        line = json.dumps(entry, ensure_ascii=False, default=str)
+        with self._lock:
+            if self._writer is None:
+                return
+            self._writer.write(line + "\n")
+            self.stats["recorded"] += 1
+
+    def lookup(self, key: str) -> Dict[str, Any]:
+        """取出下一条匹配的录制记录
+
+        Raises:
+            CassetteMiss: 没有匹配的记录
+        """
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                self.stats["misses"] += 1
+                raise CassetteMiss("磁带中没有匹配的请求")
+            cursor = self._cursors.get(key, 0)
+            self._cursors[key] = cursor + 1
+            self.stats["replayed"] += 1
+            return entries[cursor % len(entries)]
+
+    def delay_for(self, entry: Dict[str, Any]) -> float:
+        """回放时的模拟延迟（秒）"""
+        if self.latency is None:
+            return 0.0
+        if self.latency == "recorded":
+            return float(entry.get("elapsed", 0.0))
+        return float(self.latency)
+
+    @staticmethod
+    def result_of(entry: Dict[str, Any]) -> Any:
+        """把录制记录还原为响应JSON或抛出录制时的HTTP错误"""
+        status_code = entry.get("status_code")
+        if status_code is not None:
+            raise CassetteHTTPError(f"{status_code} Error (回放): {entry['url']}", status_code, entry.get("headers"))
+        return entry["response"]
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats)
+        stats.update({"mode": self.mode, "path": self.path, "requests": sum(len(v) for v in self._entries.values())})
+        return stats
+
+    def close(self) -> None:
+        """关闭录制文件"""
+        with self._lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+
+
+def _error_details(error: Exception) -> tuple:
+    response = getattr(error, "response", None)
+    status = getattr(response, "status_code", None)
+    headers = {}
+    retry_after = getattr(response, "headers", {}).get("Retry-After") if response is not None else None
+    if retry_after is not None:
+        headers["Retry-After"] = retry_after
+    return status, headers
+
+
+class CassetteTransport:
+    """同步传输层包装：录制模式下转发并录制，回放模式下直接返回录制的响应"""
+
+    def __init__(self, inner: Any, cassette: Cassette):
+        self.inner = inner
+        self.cassette = cassette
+
+    def post_json(self, url: str, headers: Dict[str, str], payload: Dict[str, Any], timeout: Optional[float] = None) -> Dict[str, Any]:
+        key = Cassette.make_key(url, headers, payload)
+        if self.cassette.mode == "replay":
+            entry = self.cassette.lookup(key)
+            time.sleep(self.cassette.delay_for(entry))
+            return Cassette.result_of(entry)
+        start = time.perf_counter()
+        try:
+            result = self.inner.post_json(url, headers, payload, timeout=timeout)
+        except Exception as e:
+            status, error_headers = _error_details(e)
+            if status is not None:
+                self.cassette.record(key, url, time.perf_counter() - start, status_code=status, headers=error_headers)
+            raise
+        self.cassette.record(key, url, time.perf_counter() - start, response=result)
+        return result
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.inner, name)
+
+
+class AsyncCassetteTransport:
+    """异步传输层包装，行为与 CassetteTransport 相同"""
+
+    def __init__(self, inner: Any, cassette: Cassette):
+        self.inner = inner
+        self.cassette = cassette
+
+    async def post_json(self, url: str, headers: Dict[str, str], payload: Dict[str, Any]) -> Dict[str, Any]:
+        key = Cassette.make_key(url, headers, payload)
+        if self.cassette.mode == "replay":
+            entry = self.cassette.lookup(key)
+            await asyncio.sleep(self.cassette.delay_for(entry))
+            return Cassette.result_of(entry)
+        start = time.perf_counter()
+        try:
+            result = await self.inner.post_json(url, headers, payload)
+        except Exception as e:
+            status, error_headers = _error_details(e)
+            if status is not None:
+                self.cassette.record(key, url, time.perf_counter() - start, status_code=status, headers=error_headers)
+            raise
+        self.cassette.record(key, url, time.perf_counter() - start, response=result)
+        return result
+
+    async def conditional_get(self, url: str, headers: Dict[str, str]) -> tuple:
+        if self.cassette.mode == "replay":
+            raise CassetteMiss("回放模式下不访问源站")
+        return await self.inner.conditional_get(url, headers)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.inner, name)
@@ -0,0 +1,203 @@
+from __future__ import annotations
+import hashlib
+from typing import Any, Dict, Iterable, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from .search_hit import item_text
+from .search_rerank import tokenize
+
+# 广告/营销平台添加的跟踪参数（不影响页面内容）；from、ref、source 等通用参数常用于内容或路由，不在此列
+_TRACKING_PARAMS = {"gclid", "dclid", "gbraid", "wbraid", "fbclid", "msclkid", "yclid", "igshid", "spm",
+                    "mc_cid", "mc_eid", "_hsenc", "_hsmi", "mkt_tok"}
+
+
+def canonical_url(url: str) -> str:
+    """规范化URL，用于判断两个结果是否指向同一页面
+
+    - 协议和域名转为小写，去掉 www. 前缀和默认端口
+    - 去掉片段（#...）、utm_* 等跟踪参数，剩余参数按名称排序
+    - 去掉路径末尾的斜杠
+    """
+    parts = urlsplit(str(url).strip())
+    scheme = (parts.scheme or "http").lower()
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if parts.port and not ((scheme == "http" and parts.port == 80) or (scheme == "https" and parts.port == 443)):
+        host = f"{host}:{parts.port}"
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_") and key.lower() not in _TRACKING_PARAMS
+    )
+    path = parts.path.rstrip("/") or ""
+    # http 与 https 视为同一页面
+    return urlunsplit(("https" if scheme == "http" else scheme, host, path, urlencode(query), ""))
+
+
+def simhash(text: str, bits: int = 64) -> int:
+    """计算文本的SimHash指纹，内容相近的文本指纹的汉明距离也小"""
+    weights = [0] * bits
+    for token in tokenize(text):
+        value = int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=bits // 8).digest(), "big")
+        for i in range(bits):
+            weights[i] += 1 if value >> i & 1 else -1
+    fingerprint = 0
+    for i, weight in enumerate(weights):
+        if weight > 0:
+            fingerprint |= 1 << i
+    return fingerprint
+
+
+def extract_hits(payload: Dict[str, Any], engine: Optional[str] = None, query: Optional[str] = None,
+                 include_raw: bool = False) -> List[Dict[str, Any]]:
+    """把不同引擎的返回结构统一为结果列表
+
+    Tavily 结果位于 "results"，Jina 结果位于 "data"。content 统一为摘要（字段映射见 item_text），
+    默认不包含原文，避免合并结果携带整页内容。
+
+    Args:
+        payload: 搜索引擎返回的结果字典
+        engine: 引擎名称，写入每条结果的 engine 字段
+        query: 查询字符串，写入每条结果的 query 字段
+        include_raw: 是否在 raw_content 字段中保留原文
+
+    Returns:
+        [{title, url, content, score, engine, query}] 列表
+    """
+    if not isinstance(payload, dict) or "error" in payload:
+        return []
+    items = payload.get("results")
+    if items is None:
+        items = payload.get("data") or []
+    query = query if query is not None else payload.get("query")
+    hits = []
+    for item in items:
+        if not isinstance(item, dict) or not item.get("url"):
+            continue
+        snippet, raw = item_text(item, engine)
+        hit = {
+            "title": item.get("title", ""),
+            "url": item["url"],
+            "content": snippet,
+            "score": item.get("score"),
+            "engine": item.get("engine") or engine,
+            "query": query,
+        }
+        if include_raw and raw:
+            hit["raw_content"] = raw
+        hits.append(hit)
+    return hits
+
+
+class ResultDeduplicator:
+    """结果去重：先按规范化URL去重，再按SimHash内容相似度去重，保留分数最高的副本
+
+    SimHash指纹分成 max_distance + 1 段，汉明距离不超过 max_distance 的两个指纹
+    至少有一段完全相同，因此只需比较同段相同的候选，避免两两比较。
+    """
+
+    def __init__(self, max_distance: int = 3, bits: int = 64):
+        """初始化去重器
+
+        Args:
+            max_distance: 视为近似重复的最大汉明距离
+            bits: SimHash位数
+        """
+        self.max_distance = max_distance
+        self.bits = bits
+        self.bands = max_distance + 1
+        self.band_bits = bits // self.bands
+        self.stats = {"input": 0, "url_duplicates": 0, "near_duplicates": 0}
+        self._hits: List[Dict[str, Any]] = []
+        self._by_url: Dict[str, int] = {}
+        self._fingerprints: List[int] = []
+        self._band_index: Dict[tuple, List[int]] = {}
+
+    @staticmethod
+    def _rank(hit: Dict[str, Any]) -> float:
+        score = hit.get("score")
+        return score if isinstance(score, (int, float)) else -1.0
+
+    def _bands_of(self, fingerprint: int) -> List[tuple]:
+        mask = (1 << self.band_bits) - 1
+        return [(band, fingerprint >> (band * self.band_bits) & mask) for band in range(self.bands)]
+
+    def _find_near_duplicate(self, fingerprint: int) -> Optional[int]:
+        for band_key in self._bands_of(fingerprint):
+            for slot in self._band_index.get(band_key, ()):
+                if bin(self._fingerprints[slot] ^ fingerprint).count("1") <= self.max_distance:
+                    return slot
+        return None
+
+    def add(self, hit: Dict[str, Any]) -> bool:
+        """加入一条结果
+
+        Args:
+            hit: extract_hits 产出的结果
+
+        Returns:
+            是否作为新结果加入（False 表示与已有结果重复）
+        """
+        self.stats["input"] += 1
+        url_key = canonical_url(hit["url"])
+        slot = self._by_url.get(url_key)
+        if slot is not None:
+            self.stats["url_duplicates"] += 1
+            self._keep_better(slot, hit)
+            return False
+
+        content = hit.get("content") or ""
+        fingerprint = simhash(f"{hit.get('title', '')} {content}", self.bits) if content else None
+        if fingerprint is not None:
+            slot = self._find_near_duplicate(fingerprint)
+            if slot is not None:
+                self.stats["near_duplicates"] += 1
+                self._by_url[url_key] = slot
+                self._keep_better(slot, hit)
+                return False
+
+        slot = len(self._hits)
+        self._hits.append(hit)
+        self._by_url[url_key] = slot
+        self._fingerprints.append(fingerprint if fingerprint is not None else 0)
+        if fingerprint is not None:
+            for band_key in self._bands_of(fingerprint):
+                self._band_index.setdefault(band_key, []).append(slot)
+        return True
+
+    def _keep_better(self, slot: int, hit: Dict[str, Any]) -> None:
+        if self._rank(hit) > self._rank(self._hits[slot]):
+            self._hits[slot] = hit
+
+    def extend(self, hits: Iterable[Dict[str, Any]]) -> None:
+        for hit in hits:
+            self.add(hit)
+
+    def results(self) -> List[Dict[str, Any]]:
+        """按分数从高到低返回去重后的结果（无分数的结果保持原有顺序排在后面）"""
+        return sorted(self._hits, key=self._rank, reverse=True)
+
+
+def merge_results(payloads: List[Dict[str, Any]], queries: Optional[List[str]] = None, engine: Optional[str] = None, max_distance: int = 3) -> Dict[str, Any]:
+    """合并多个查询的搜索结果并去重
+
+    Args:
+        payloads: 每个查询的原始返回结果
+        queries: 与 payloads 对应的查询列表
+        engine: 引擎名称
+        max_distance: 视为近似重复的最大SimHash汉明距离
+
+    Returns:
+        {"queries", "results": [{title, url, content, score, engine, query}], "errors", "stats"}
+    """
+    queries = list(queries) if queries is not None else [None] * len(payloads)
+    deduplicator = ResultDeduplicator(max_distance=max_distance)
+    errors = []
+    for query, payload in zip(queries, payloads):
+        if isinstance(payload, dict) and "error" in payload:
+            errors.append({"query": query, "error": payload["error"]})
+            continue
+        deduplicator.extend(extract_hits(payload, engine=engine, query=query))
+    results = deduplicator.results()
+    stats = dict(deduplicator.stats, unique=len(results))
+    return {"queries": queries, "results": results, "errors": errors, "stats": stats}
@@ -1,13 +1,39 @@
 from __future__ import annotations  # python 向前处理
 import asyncio
 import os
-import requests
 import json
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from urllib.parse import urlsplit
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any
+from typing import List, Dict, Any, AsyncIterator, Awaitable, Callable, Optional, Tuple, Union
 from tavily import TavilyClient
 from dotenv import load_dotenv
 from enum import Enum, auto
+from .search_cache import SearchCache
+from .search_cassette import AsyncCassetteTransport, Cassette, CassetteTransport
+from .search_transport import AsyncHttpTransport, HttpTransport
+from .search_singleflight import SingleFlight
+from .search_limiter import AdaptiveConcurrencyLimiter
+from .search_ratelimit import QuotaExceeded, RateLimitExceeded, SearchRateLimiter
+from .search_rerank import LocalReranker
+from .search_dedup import ResultDeduplicator, canonical_url, extract_hits, merge_results
+from .search_hit import SearchHit, parse_hits
+from .search_archive import SearchArchive
+from .search_page_cache import PageCache
+from .search_semantic_cache import SemanticCache
+from .search_metrics import LogExporter, MetricsExporter, PrometheusExporter, SearchMetrics, instrumented
+from .search_resilience import CircuitBreaker, CircuitOpenError, ResiliencePolicy
+
+class _AdmissionDegraded(Exception):
+    """限流时改用降级结果（过期缓存或备用引擎），用于从重试循环中带出结果"""
+
+    def __init__(self, result: Dict[str, Any]):
+        super().__init__("degraded")
+        self.result = result
+
 
 class SearchEngineType(Enum):
     """搜索引擎类型枚举"""
@@ -15,6 +41,7 @@ class SearchEngineType(Enum):
     GOOGLE = auto()  # Google搜索引擎
     BING = auto()    # Bing搜索引擎
     JINA = auto()    # Jina搜索引擎
+    FEDERATED = auto()  # 联合搜索（同时使用多个搜索引擎）
     # 可以添加更多搜索引擎类型
     
     def __str__(self):
@@ -24,32 +51,220 @@ class SearchEngineType(Enum):
 class SearchEngineFactory:
     """搜索引擎工厂类，负责创建不同类型的搜索引擎实例"""
     
-    @staticmethod
-    def create_engine(engine_type: SearchEngineType, **kwargs) -> SearchEngine:
+    # 所有引擎共享的默认缓存与传输层（懒加载）
+    _default_cache: Optional[SearchCache] = None
+    _default_transport: Optional[HttpTransport] = None
+    _default_async_transport: Optional[AsyncHttpTransport] = None
+    _default_page_cache: Optional[PageCache] = None
+    _default_metrics: Optional[SearchMetrics] = None
+    _default_semantic_cache: Optional[SemanticCache] = None
+    # 默认向量模型创建失败的原因，记录后不再重复尝试
+    _semantic_cache_error: Optional[Exception] = None
+    _default_archive: Optional[SearchArchive] = None
+    # 录制/回放磁带，None 且 _cassette_checked 为 True 表示未启用
+    _cassette: Optional[Cassette] = None
+    _cassette_checked = False
+    _metrics_exporters: List[MetricsExporter] = []
+    # 引擎实例注册表：按 引擎类型 + 配置 复用实例
+    _registry: Dict[tuple, SearchEngine] = {}
+    _registry_locks: Dict[tuple, threading.Lock] = {}
+    _registry_lock = threading.Lock()
+    _env_loaded = False
+    # 联合搜索引擎可接受的配置参数（FederatedSearchEngine 的构造参数）
+    _FEDERATED_OPTIONS = ("mode", "hedge_percentile", "hedge_delay", "timeout", "min_samples", "history_size")
+
+    @classmethod
+    def _load_env(cls) -> None:
+        """只加载一次 .env 文件"""
+        if not cls._env_loaded:
+            load_dotenv()
+            cls._env_loaded = True
+
+    @classmethod
+    def get_engine(cls, engine_type: SearchEngineType, **kwargs) -> SearchEngine:
+        """获取（必要时创建）共享的搜索引擎实例
+        
+        相同的引擎类型和配置返回同一个实例，适合在工具函数中每次调用时使用，
+        避免重复解析环境变量和创建客户端。并发首次调用时只会创建一次。
+        
+        Args:
+            engine_type: 搜索引擎类型（枚举）
+            **kwargs: 传给 create_engine 的参数
+            
+        Returns:
+            搜索引擎实例
+        """
+        key = cls._registry_key(engine_type, kwargs)
+        engine = cls._registry.get(key)
+        if engine is not None:
+            return engine
+        with cls._registry_lock:
+            lock = cls._registry_locks.setdefault(key, threading.Lock())
+        with lock:
+            engine = cls._registry.get(key)
+            if engine is None:
+                engine = cls.create_engine(engine_type, **kwargs)
+                cls._registry[key] = engine
+        return engine
+
+    @classmethod
+    def _registry_key(cls, engine_type: SearchEngineType, config: Dict[str, Any]) -> tuple:
+        """把配置转换为可哈希的注册表键，缓存、传输层等对象按实例区分"""
+        def _freeze(value: Any) -> Any:
+            if isinstance(value, dict):
+                return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+            if isinstance(value, (list, tuple)):
+                return tuple(_freeze(v) for v in value)
+            try:
+                hash(value)
+                return value
+            except TypeError:
+                return ("id", id(value))
+        return (engine_type, _freeze(config))
+
+    @classmethod
+    def use_cassette(cls, path: str, mode: str = "replay", latency: Union[str, float, None] = "recorded") -> Cassette:
+        """启用录制/回放模式，之后创建的引擎都通过磁带收发请求
+        
+        也可以通过环境变量启用：SEARCH_CASSETTE_MODE（record / replay）、SEARCH_CASSETTE_PATH、
+        SEARCH_CASSETTE_LATENCY（"recorded"、固定秒数或 "none"）
+        
+        Args:
+            path: 磁带文件路径（.jsonl.gz）
+            mode: "record" 录制真实响应，"replay" 回放录制的响应（不访问网络，引擎不限流、不消耗月度额度）
+            latency: 回放延迟，"recorded" 使用录制时的耗时，数字为固定秒数，None 表示不延迟
+            
+        Returns:
+            磁带实例（可通过 get_stats 查看录制/回放次数）
+        """
+        cls.close_all()
+        cassette = Cassette(path, mode=mode, latency=latency)
+        with cls._registry_lock:
+            cls._cassette, cls._cassette_checked = cassette, True
+        return cassette
+
+    @classmethod
+    def get_cassette(cls) -> Optional[Cassette]:
+        """获取当前启用的磁带，未启用时返回None"""
+        if not cls._cassette_checked:
+            cls._load_env()
+            mode = os.getenv("SEARCH_CASSETTE_MODE", "").lower()
+            if mode in ("record", "replay"):
+                latency = os.getenv("SEARCH_CASSETTE_LATENCY", "recorded").lower()
+                cls._cassette = Cassette(
+                    os.getenv("SEARCH_CASSETTE_PATH", os.path.join(".cache", "search_cassette.jsonl.gz")),
+                    mode=mode,
+                    latency=None if latency == "none" else latency if latency == "recorded" else float(latency),
+                )
+            cls._cassette_checked = True
+        return cls._cassette
+
+    @classmethod
+    def _replay_api_key(cls) -> Optional[str]:
+        """回放模式下不需要真实密钥"""
+        cassette = cls.get_cassette()
+        return "cassette-replay" if cassette is not None and cassette.mode == "replay" else None
+
+    @classmethod
+    def reset(cls) -> None:
+        """清空注册表和共享的默认组件，之后的调用会按当前环境变量重新创建（不关闭连接）"""
+        with cls._registry_lock:
+            cls._registry = {}
+            cls._registry_locks = {}
+            cls._default_cache = None
+            cls._default_transport = None
+            cls._default_async_transport = None
+            cls._default_page_cache = None
+            cls._default_metrics = None
+            cls._default_semantic_cache = None
+            cls._semantic_cache_error = None
+            cls._default_archive = None
+            cls._cassette = None
+            cls._cassette_checked = False
+            cls._env_loaded = False
+
+    @classmethod
+    def close_all(cls) -> None:
+        """关闭注册表中的引擎、共享的连接池和缓存，并清空注册表"""
+        with cls._registry_lock:
+            engines = list(cls._registry.values())
+            resources = [cls._default_transport, cls._default_cache, cls._default_page_cache, cls._default_semantic_cache,
+                         cls._default_archive, cls._cassette]
+            exporters, cls._metrics_exporters = cls._metrics_exporters, []
+        for exporter in exporters:
+            exporter.stop()
+        for engine in engines:
+            close = getattr(engine, "close", None)
+            if close is not None:
+                close()
+        for resource in resources:
+            if resource is not None:
+                resource.close()
+        cls.reset()
+
+    @classmethod
+    def create_engine(cls, engine_type: SearchEngineType, cache: Union[bool, SearchCache, None] = None, transport: Optional[HttpTransport] = None,
+                      rate_limiter: Union[bool, SearchRateLimiter, None] = None, fallback_engine: Optional[SearchEngine] = None,
+                      resilience: Union[bool, ResiliencePolicy, None] = True, semantic_cache: Union[bool, SemanticCache, Any, None] = None,
+                      archive: Union[bool, SearchArchive, None] = None, **kwargs) -> SearchEngine:
         """创建搜索引擎实例
         
         Args:
             engine_type: 搜索引擎类型（枚举）
-            **kwargs: 搜索引擎配置参数
+            cache: 结果缓存，传入SearchCache实例使用该缓存，传入True使用默认的持久化缓存
+            transport: HTTP传输层，为None时注入所有引擎共享的默认连接池
+            rate_limiter: 限流器，为None时按环境变量（如 TAVILY_RPS、TAVILY_RPM、TAVILY_MONTHLY_BUDGET）创建，
+                为False时不限流也不计入月度额度（如压测、测试）；启用回放磁带时总是不限流
+            fallback_engine: 触发限流或熔断时使用的备用引擎
+                （联合搜索只支持 rate_limiter=False，不支持 fallback_engine，各后端按环境变量创建限流器）
+            resilience: 重试与熔断策略，True 时按环境变量（如 TAVILY_MAX_ATTEMPTS、TAVILY_BREAKER_THRESHOLD、
+                TAVILY_BREAKER_RECOVERY）创建，False/None 时不启用
+            semantic_cache: 语义缓存，传入SemanticCache实例使用该缓存，传入向量模型（提供 embed_query 方法的对象
+                或 文本 -> 向量 的函数）时用它创建默认语义缓存，传入True时用 EmbeddingFactory 创建默认语义缓存
+            archive: 搜索结果归档，传入True使用默认归档目录（SEARCH_ARCHIVE_DIR）
+            **kwargs: 搜索引擎配置参数，联合搜索为 backends 和 FederatedSearchEngine 的构造参数
             
         Returns:
             搜索引擎实例
         
         Raises:
-            ValueError: 当指定的搜索引擎类型不受支持时
+            ValueError: 当指定的搜索引擎类型不受支持，或联合搜索传入了不支持的参数时
         """
+        transport = transport or cls.get_default_transport()
         if engine_type == SearchEngineType.TAVILY:
             api_key = kwargs.get("api_key")
             if not api_key:
-                load_dotenv()
-                api_key = os.getenv("TAVILY_API_KEY")
-            return TavilySearchEngine(api_key=api_key)
+                cls._load_env()
+                api_key = os.getenv("TAVILY_API_KEY") or cls._replay_api_key()
+            engine = TavilySearchEngine(api_key=api_key, transport=transport)
         elif engine_type == SearchEngineType.JINA:
             api_key = kwargs.get("api_key")
             if not api_key:
-                load_dotenv()
-                api_key = os.getenv("JINA_API_KEY")
-            return JinaSearchEngine(api_key=api_key)
+                cls._load_env()
+                api_key = os.getenv("JINA_API_KEY") or cls._replay_api_key()
+            page_cache = kwargs.get("page_cache")
+            if page_cache is True:
+                page_cache = cls.get_default_page_cache()
+            engine = JinaSearchEngine(
+                api_key=api_key,
+                transport=transport,
+                async_transport=cls.get_default_async_transport(),
+                page_cache=page_cache,
+            )
+        elif engine_type == SearchEngineType.FEDERATED:
+            backends = kwargs.pop("backends", [SearchEngineType.TAVILY, SearchEngineType.JINA])
+            unsupported = sorted(set(kwargs) - set(cls._FEDERATED_OPTIONS))
+            if unsupported:
+                raise ValueError(f"联合搜索不支持的参数: {', '.join(unsupported)}，"
+                                 f"可用参数: backends, {', '.join(cls._FEDERATED_OPTIONS)}")
+            if rate_limiter not in (None, False) or fallback_engine is not None:
+                raise ValueError("联合搜索不支持传入 rate_limiter 实例和 fallback_engine，请在各后端引擎上配置")
+            engines = [cls.create_engine(backend, cache=cache, transport=transport, rate_limiter=rate_limiter, resilience=resilience,
+                                         semantic_cache=semantic_cache, archive=archive)
+                       for backend in backends]
+            federated = FederatedSearchEngine(engines, **kwargs)
+            federated.metrics = cls.get_default_metrics()
+            return federated
         # 可以在此添加其他搜索引擎的支持
         # elif engine_type == SearchEngineType.GOOGLE:
         #     return GoogleSearchEngine(**kwargs)
@@ -58,37 +273,675 @@ class SearchEngineFactory:
         else:
             raise ValueError(f"不支持的搜索引擎类型: {engine_type}") 
 
+        if cache is True:
+            cache = cls.get_default_cache()
+        if cache:
+            engine.cache = cache
+        cassette = cls.get_cassette()
+        if cassette is not None and cassette.mode == "replay":
+            # 回放不发出真实请求，不限流也不计入月度额度
+            rate_limiter = None
+        elif rate_limiter is None:
+            rate_limiter = cls._rate_limiter_from_env(engine.name)
+        engine.rate_limiter = rate_limiter or None
+        engine.fallback_engine = fallback_engine
+        if resilience is True:
+            resilience = cls._resilience_from_env(engine.name)
+        engine.resilience = resilience or None
+        engine.metrics = cls.get_default_metrics()
+        if semantic_cache is True:
+            semantic_cache = cls.get_default_semantic_cache()
+        elif semantic_cache and not isinstance(semantic_cache, SemanticCache):
+            semantic_cache = cls.get_default_semantic_cache(embeddings=semantic_cache)
+        engine.semantic_cache = semantic_cache or None
+        if archive is True:
+            archive = cls.get_default_archive()
+        engine.archive = archive or None
+        return engine
+
+    @classmethod
+    def _resilience_from_env(cls, name: str) -> ResiliencePolicy:
+        """根据环境变量创建重试与熔断策略，例如 TAVILY_MAX_ATTEMPTS=3、TAVILY_BREAKER_THRESHOLD=5、
+        TAVILY_BREAKER_RECOVERY=30（秒）
+        """
+        cls._load_env()
+        prefix = name.upper()
+        breaker = CircuitBreaker(
+            name=name,
+            failure_threshold=int(os.getenv(f"{prefix}_BREAKER_THRESHOLD", "5")),
+            recovery_timeout=float(os.getenv(f"{prefix}_BREAKER_RECOVERY", "30")),
+        )
+        return ResiliencePolicy(
+            name=name,
+            max_attempts=int(os.getenv(f"{prefix}_MAX_ATTEMPTS", "3")),
+            breaker=breaker,
+        )
+
+    @classmethod
+    def _rate_limiter_from_env(cls, name: str) -> Optional[SearchRateLimiter]:
+        """根据环境变量创建限流器，例如 TAVILY_RPS=5、TAVILY_RPM=100、TAVILY_MONTHLY_BUDGET=1000
+        
+        月度用量保存在 SEARCH_BUDGET_DIR（默认 .cache）下的 {name}_budget.json 中
+        """
+        cls._load_env()
+        prefix = name.upper()
+        rps = os.getenv(f"{prefix}_RPS")
+        rpm = os.getenv(f"{prefix}_RPM")
+        budget = os.getenv(f"{prefix}_MONTHLY_BUDGET")
+        if not (rps or rpm or budget):
+            return None
+        return SearchRateLimiter(
+            requests_per_second=float(rps) if rps else None,
+            requests_per_minute=float(rpm) if rpm else None,
+            monthly_budget=int(budget) if budget else None,
+            budget_path=os.path.join(os.getenv("SEARCH_BUDGET_DIR", ".cache"), f"{name}_budget.json"),
+        )
+
+    @classmethod
+    def get_default_transport(cls) -> HttpTransport:
+        """获取所有引擎共享的同步传输层
+
+        可通过环境变量配置：SEARCH_HTTP_POOL_MAXSIZE、SEARCH_HTTP_CONNECT_TIMEOUT、
+        SEARCH_HTTP_READ_TIMEOUT、SEARCH_HTTP2（"1"/"true" 启用HTTP/2）
+        """
+        if cls._default_transport is None:
+            cls._load_env()
+            cls._default_transport = HttpTransport(
+                pool_maxsize=int(os.getenv("SEARCH_HTTP_POOL_MAXSIZE", "20")),
+                connect_timeout=float(os.getenv("SEARCH_HTTP_CONNECT_TIMEOUT", "5")),
+                read_timeout=float(os.getenv("SEARCH_HTTP_READ_TIMEOUT", "30")),
+                http2=os.getenv("SEARCH_HTTP2", "").lower() in ("1", "true", "yes"),
+            )
+            cls._default_transport.metrics = cls.get_default_metrics()
+            cassette = cls.get_cassette()
+            if cassette is not None:
+                cls._default_transport = CassetteTransport(cls._default_transport, cassette)
+        return cls._default_transport
+
+    @classmethod
+    def get_default_async_transport(cls) -> AsyncHttpTransport:
+        """获取所有引擎共享的异步传输层"""
+        if cls._default_async_transport is None:
+            cls._default_async_transport = AsyncHttpTransport()
+            cls._default_async_transport.metrics = cls.get_default_metrics()
+            cassette = cls.get_cassette()
+            if cassette is not None:
+                cls._default_async_transport = AsyncCassetteTransport(cls._default_async_transport, cassette)
+        return cls._default_async_transport
+
+    @classmethod
+    def get_default_metrics(cls) -> SearchMetrics:
+        """获取所有引擎共享的指标集合
+        
+        可通过环境变量启用导出：SEARCH_METRICS_PORT（Prometheus /metrics 接口端口）、
+        SEARCH_METRICS_HOST（监听地址，默认只监听 127.0.0.1，需要对外暴露时设为 0.0.0.0）、
+        SEARCH_METRICS_LOG_INTERVAL（定期写入日志的间隔秒数）
+        """
+        if cls._default_metrics is None:
+            with cls._registry_lock:
+                if cls._default_metrics is None:
+                    cls._load_env()
+                    metrics = SearchMetrics()
+                    port = os.getenv("SEARCH_METRICS_PORT")
+                    if port:
+                        cls._metrics_exporters.append(PrometheusExporter(
+                            metrics, port=int(port), host=os.getenv("SEARCH_METRICS_HOST", "127.0.0.1")).start())
+                    interval = os.getenv("SEARCH_METRICS_LOG_INTERVAL")
+                    if interval:
+                        cls._metrics_exporters.append(LogExporter(metrics, interval=float(interval)).start())
+                    cls._default_metrics = metrics
+        return cls._default_metrics
+
+    @classmethod
+    def get_default_semantic_cache(cls, embeddings: Any = None) -> SemanticCache:
+        """获取默认的语义缓存
+        
+        向量模型优先使用传入的 embeddings，否则由 EmbeddingFactory 创建
+        （需要能导入 LangGraph/02-llm工厂 下的 embedding_factory 模块，即该目录在 sys.path 中）。
+        可通过环境变量配置：SEARCH_SEMANTIC_CACHE_PATH、SEARCH_SEMANTIC_THRESHOLD（默认0.92）、
+        SEARCH_EMBEDDING_PROVIDER（默认 dashscope）
+        
+        Args:
+            embeddings: 向量模型（提供 embed_query 方法的对象或 文本 -> 向量 的函数）
+        
+        Returns:
+            语义缓存
+        
+        Raises:
+            ValueError: 默认语义缓存已使用其他向量模型创建时
+            RuntimeError: 未传入向量模型且无法通过 EmbeddingFactory 创建时（失败原因会被记录，不重复尝试）
+        """
+        with cls._registry_lock:
+            if cls._default_semantic_cache is not None:
+                if embeddings is not None and cls._default_semantic_cache.embeddings is not embeddings:
+                    raise ValueError("默认语义缓存已使用其他向量模型创建，请直接传入 SemanticCache 实例")
+                return cls._default_semantic_cache
+            cls._load_env()
+            if embeddings is None:
+                if cls._semantic_cache_error is not None:
+                    raise cls._semantic_cache_error
+                try:
+                    from embedding_factory import EmbeddingFactory, EmbeddingProviderType
+
+                    provider = os.getenv("SEARCH_EMBEDDING_PROVIDER", EmbeddingProviderType.DASHSCOPE)
+                    embeddings = EmbeddingFactory.create_embedding(provider)
+                except Exception as e:
+                    cls._semantic_cache_error = RuntimeError(
+                        f"无法通过 EmbeddingFactory 创建语义缓存的向量模型（{e}），"
+                        f"请把 embedding_factory 所在目录加入 sys.path，或传入 semantic_cache=向量模型 / SemanticCache 实例"
+                    )
+                    raise cls._semantic_cache_error from e
+            cls._default_semantic_cache = SemanticCache(
+                embeddings,
+                path=os.getenv("SEARCH_SEMANTIC_CACHE_PATH", os.path.join(".cache", "semantic_cache.sqlite3")),
+                threshold=float(os.getenv("SEARCH_SEMANTIC_THRESHOLD", "0.92")),
+            )
+        return cls._default_semantic_cache
+
+    @classmethod
+    def get_default_archive(cls) -> SearchArchive:
+        """获取默认的搜索结果归档（目录可通过环境变量 SEARCH_ARCHIVE_DIR 配置）"""
+        if cls._default_archive is None:
+            cls._load_env()
+            cls._default_archive = SearchArchive(os.getenv("SEARCH_ARCHIVE_DIR", os.path.join(".cache", "search_archive")))
+        return cls._default_archive
+
+    @classmethod
+    def get_default_page_cache(cls) -> PageCache:
+        """获取默认的网页缓存（路径可通过环境变量 SEARCH_PAGE_CACHE_PATH 配置）"""
+        if cls._default_page_cache is None:
+            cls._load_env()
+            path = os.getenv("SEARCH_PAGE_CACHE_PATH", os.path.join(".cache", "page_cache.sqlite3"))
+            cls._default_page_cache = PageCache(path=path)
+        return cls._default_page_cache
+
+    @classmethod
+    def get_default_cache(cls) -> SearchCache:
+        """获取默认的共享缓存（路径可通过环境变量 SEARCH_CACHE_PATH 配置）"""
+        if cls._default_cache is None:
+            cls._load_env()
+            path = os.getenv("SEARCH_CACHE_PATH", os.path.join(".cache", "search_cache.sqlite3"))
+            cls._default_cache = SearchCache(
+                path=path,
+                engine_ttls={"tavily": 24 * 3600, "jina": 6 * 3600},
+            )
+        return cls._default_cache
+
 
 
         
 
 # 抽象搜索引擎接口
 class SearchEngine(ABC):
+    # 引擎名称，用于缓存键和按引擎配置TTL
+    name: str = "base"
+    # 结果缓存，由SearchEngineFactory按需注入
+    cache: Optional[SearchCache] = None
+    # 限流器与限流时的备用引擎，由SearchEngineFactory按需注入
+    rate_limiter: Optional[SearchRateLimiter] = None
+    fallback_engine: Optional[SearchEngine] = None
+    # 重试与熔断策略，由SearchEngineFactory注入
+    resilience: Optional[ResiliencePolicy] = None
+    # 指标收集，由SearchEngineFactory注入
+    metrics: Optional[SearchMetrics] = None
+    # 语义缓存（复用相似查询的结果），由SearchEngineFactory按需注入
+    semantic_cache: Optional[SemanticCache] = None
+    # 搜索结果归档，由SearchEngineFactory按需注入
+    archive: Optional[SearchArchive] = None
+
+    @property
+    def singleflight(self) -> SingleFlight:
+        """在途请求合并器（每个引擎实例一个，懒加载）"""
+        flight = self.__dict__.get("_singleflight")
+        if flight is None:
+            flight = self.__dict__.setdefault("_singleflight", SingleFlight())
+        return flight
+
+    def _call(self, method: str, query: str, options: Optional[Dict[str, Any]], fetch: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """统一的请求入口：先查缓存，未命中时合并相同的在途请求，再执行fetch并缓存成功结果
+        
+        Args:
+            method: 方法名称
+            query: 查询字符串
+            options: 影响结果的其他参数
+            fetch: 实际发起请求的函数
+            
+        Returns:
+            搜索结果字典
+        """
+        key = SearchCache.make_key(self.name, method, query, options)
+        if self.cache is not None:
+            result = self.cache.get(key)
+            if result is not None:
+                if self.metrics is not None:
+                    self.metrics.record_cache_hit(self.name, method)
+                return result
+        semantic_scope = self._semantic_scope(method, options)
+        vector = self.semantic_cache.embed(query) if self.semantic_cache is not None else None
+        if vector is not None:
+            hit = self._semantic_hit(semantic_scope, method, query, vector)
+            if hit is not None:
+                return hit
+
+        def _admit_attempt() -> None:
+            degraded = self._admit(key, method, query)
+            if degraded is not None:
+                raise _AdmissionDegraded(degraded)
+
+        def _load() -> Dict[str, Any]:
+            # 每次尝试（含重试）都在熔断器放行后单独申请限流许可，被熔断拒绝的请求不计入额度
+            try:
+                result = self._resilient(fetch, _admit_attempt if self.rate_limiter is not None else None)
+            except _AdmissionDegraded as degraded:
+                return degraded.result
+            except CircuitOpenError:
+                degraded = self._circuit_fallback(key, method, query)
+                if degraded is None:
+                    raise
+                return degraded
+            if self.cache is not None and isinstance(result, dict) and "error" not in result:
+                self.cache.set(key, result, engine=self.name)
+            if vector is not None and isinstance(result, dict) and "error" not in result and "degraded" not in result:
+                self._semantic_store(semantic_scope, query, vector, result)
+            self._archive(method, query, result)
+            return result
+
+        return self.singleflight.do(key, _load)
+
+    async def _acall(self, method: str, query: str, options: Optional[Dict[str, Any]], afetch: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        """_call 的异步版本，afetch 返回可等待对象"""
+        key = SearchCache.make_key(self.name, method, query, options)
+        if self.cache is not None:
+            result = self.cache.get(key)
+            if result is not None:
+                if self.metrics is not None:
+                    self.metrics.record_cache_hit(self.name, method)
+                return result
+        semantic_scope = self._semantic_scope(method, options)
+        vector = await self.semantic_cache.aembed(query) if self.semantic_cache is not None else None
+        if vector is not None:
+            hit = self._semantic_hit(semantic_scope, method, query, vector)
+            if hit is not None:
+                return hit
+
+        async def _admit_attempt() -> None:
+            degraded = await self._aadmit(key, method, query)
+            if degraded is not None:
+                raise _AdmissionDegraded(degraded)
+
+        async def _load() -> Dict[str, Any]:
+            try:
+                result = await self._aresilient(afetch, _admit_attempt if self.rate_limiter is not None else None)
+            except _AdmissionDegraded as degraded:
+                return degraded.result
+            except CircuitOpenError:
+                degraded = await self._acircuit_fallback(key, method, query)
+                if degraded is None:
+                    raise
+                return degraded
+            if self.cache is not None and isinstance(result, dict) and "error" not in result:
+                self.cache.set(key, result, engine=self.name)
+            if vector is not None and isinstance(result, dict) and "error" not in result and "degraded" not in result:
+                self._semantic_store(semantic_scope, query, vector, result)
+            self._archive(method, query, result)
+            return result
+
+        return await self.singleflight.ado(key, _load)
+
+    def _semantic_scope(self, method: str, options: Optional[Dict[str, Any]]) -> str:
+        """语义缓存的作用域：只在相同引擎、方法和选项的查询之间复用结果"""
+        return f"{self.name}:{method}:{json.dumps(options or {}, sort_keys=True, ensure_ascii=False)}"
+
+    def _semantic_hit(self, scope: str, method: str, query: str, vector: Any) -> Optional[Dict[str, Any]]:
+        """在语义缓存中查找相似查询，命中时返回附带匹配信息的结果，语义缓存出错时按未命中处理"""
+        try:
+            match = self.semantic_cache.lookup(scope, query, vector)
+        except Exception as e:
+            print(f"语义缓存查找出错: {e}")
+            return None
+        if match is None:
+            return None
+        value, matched_query, similarity = match
+        if self.metrics is not None:
+            self.metrics.record_cache_hit(self.name, f"{method}:semantic")
+        return {**value, "semantic_match": {"query": matched_query, "similarity": round(similarity, 4)}}
+
+    def _semantic_store(self, scope: str, query: str, vector: Any, result: Dict[str, Any]) -> None:
+        """写入语义缓存，出错时只打印错误，不影响搜索结果"""
+        try:
+            self.semantic_cache.set(scope, query, vector, result)
+        except Exception as e:
+            print(f"写入语义缓存出错: {e}")
+
+    def _archive(self, method: str, query: str, result: Any) -> None:
+        """把新获取的成功结果写入归档（归档失败不影响搜索）"""
+        if self.archive is None or not isinstance(result, dict) or "error" in result or "degraded" in result:
+            return
+        try:
+            self.archive.write(self.name, query, result, method=method)
+        except Exception as e:
+            print(f"写入搜索归档出错: {e}")
+
+    def _resilient(self, fetch: Callable[[], Any], admit: Optional[Callable[[], None]] = None) -> Any:
+        """在重试与熔断保护下执行fetch（未配置策略时直接执行），admit 为每次尝试前的准入函数"""
+        if self.resilience is not None:
+            return self.resilience.call(fetch, admit)
+        if admit is not None:
+            admit()
+        return fetch()
+
+    async def _aresilient(self, afetch: Callable[[], Awaitable[Any]], aadmit: Optional[Callable[[], Awaitable[None]]] = None) -> Any:
+        """_resilient 的异步版本"""
+        if self.resilience is not None:
+            return await self.resilience.acall(afetch, aadmit)
+        if aadmit is not None:
+            await aadmit()
+        return await afetch()
+
+    def _circuit_fallback(self, key: str, method: str, query: str) -> Optional[Dict[str, Any]]:
+        """熔断时的降级结果：过期缓存或备用引擎，都不可用时返回None"""
+        if self.cache is not None:
+            stale = self.cache.get_stale(key)
+            if stale is not None:
+                return {**stale, "degraded": "stale_cache"}
+        if self.fallback_engine is not None and method == "search":
+            return self.fallback_engine.search(query)
+        return None
+
+    async def _acircuit_fallback(self, key: str, method: str, query: str) -> Optional[Dict[str, Any]]:
+        """_circuit_fallback 的异步版本"""
+        if self.cache is not None:
+            stale = self.cache.get_stale(key)
+            if stale is not None:
+                return {**stale, "degraded": "stale_cache"}
+        if self.fallback_engine is not None and method == "search":
+            return await self.fallback_engine.asearch(query)
+        return None
+
+    def get_resilience_stats(self) -> Dict[str, Any]:
+        """获取重试次数和熔断器状态（closed / open / half_open）"""
+        return self.resilience.get_stats() if self.resilience is not None else {}
+
+    def _admit(self, key: str, method: str, query: str) -> Optional[Dict[str, Any]]:
+        """向限流器申请许可，触发限制时按 on_limit 的顺序降级
+        
+        Args:
+            key: 缓存键
+            method: 方法名称
+            query: 查询字符串
+            
+        Returns:
+            None 表示已获得许可可以发起请求，否则为降级结果
+            
+        Raises:
+            RateLimitExceeded: 所有降级方式都不可用时
+        """
+        try:
+            self.rate_limiter.acquire(blocking=False)
+            return None
+        except RateLimitExceeded as e:
+            error = e
+        for action in self.rate_limiter.on_limit:
+            if action == "cache" and self.cache is not None:
+                stale = self.cache.get_stale(key)
+                if stale is not None:
+                    return {**stale, "degraded": "stale_cache"}
+            elif action == "fallback" and self.fallback_engine is not None and method == "search":
+                return self.fallback_engine.search(query)
+            elif action == "queue" and not isinstance(error, QuotaExceeded):
+                self.rate_limiter.acquire()
+                return None
+        raise error
+
+    async def _aadmit(self, key: str, method: str, query: str) -> Optional[Dict[str, Any]]:
+        """_admit 的异步版本"""
+        try:
+            await self.rate_limiter.aacquire(blocking=False)
+            return None
+        except RateLimitExceeded as e:
+            error = e
+        for action in self.rate_limiter.on_limit:
+            if action == "cache" and self.cache is not None:
+                stale = self.cache.get_stale(key)
+                if stale is not None:
+                    return {**stale, "degraded": "stale_cache"}
+            elif action == "fallback" and self.fallback_engine is not None and method == "search":
+                return await self.fallback_engine.asearch(query)
+            elif action == "queue" and not isinstance(error, QuotaExceeded):
+                await self.rate_limiter.aacquire()
+                return None
+        raise error
+
+    def remaining_budget(self) -> Optional[int]:
+        """本月剩余调用额度，未配置月度额度时返回None"""
+        return self.rate_limiter.remaining_budget() if self.rate_limiter is not None else None
+
+    def close(self) -> None:
+        """写入限流器尚未持久化的月度用量"""
+        if self.rate_limiter is not None:
+            self.rate_limiter.close()
+
+    @staticmethod
+    def _error_result(error: Exception, query: Optional[str] = None) -> Dict[str, Any]:
+        """把异常转换为错误结果字典，附带异常类型和HTTP状态码便于调用方判断是否过载"""
+        result = {"error": str(error), "error_type": type(error).__name__}
+        if query is not None:
+            result = {"query": query, **result}
+        status = getattr(getattr(error, "response", None), "status_code", None)
+        if status is not None:
+            result["status_code"] = status
+        return result
+
+    def concurrency_limiter(self, initial_limit: int = 5) -> AdaptiveConcurrencyLimiter:
+        """获取引擎实例的自适应并发限制器
+        
+        首次调用时以 initial_limit 为初始上限创建，之后沿用已经学习到的上限。
+        
+        Args:
+            initial_limit: 初始并发上限
+            
+        Returns:
+            自适应并发限制器
+        """
+        limiter = self.__dict__.get("_concurrency_limiter")
+        if limiter is None:
+            limiter = self.__dict__.setdefault(
+                "_concurrency_limiter",
+                AdaptiveConcurrencyLimiter(initial_limit=initial_limit, max_limit=max(100, initial_limit)),
+            )
+        return limiter
+
+    async def _gather_adaptive(self, queries: List[str], max_concurrency: int, search_one: Callable[[str], Awaitable[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """在自适应并发限制下执行一批查询，结果顺序与查询顺序一致"""
+        limiter = self.concurrency_limiter(max_concurrency)
+        tasks = [limiter.run(lambda query=query: search_one(query)) for query in queries]
+        return list(await asyncio.gather(*tasks))
+
     @abstractmethod
     def search(self, query: str) -> Dict[str, Any]:
         """执行搜索查询"""
         pass
     
     @abstractmethod
-    def search_with_subqueries(self, subqueries: List[str]) -> List[Dict[str, Any]]:
-        """执行子查询搜索"""
+    def search_with_subqueries(self, subqueries: List[str], merge: bool = False, target_results: Optional[int] = None,
+                               min_score: float = 0.0, max_concurrency: int = 3) -> Union[List[Dict[str, Any]], Dict[str, Any]]:
+        """执行子查询搜索，merge=True 时返回去重合并后的结果，指定 target_results 时凑够结果后提前结束"""
         pass
     
     @abstractmethod
-    async def search_async(self, queries: List[str], max_concurrency: int = 5) -> List[Dict[str, Any]]:
-        """执行异步搜索"""
+    async def search_async(self, queries: List[str], max_concurrency: int = 5, merge: bool = False) -> Union[List[Dict[str, Any]], Dict[str, Any]]:
+        """执行异步搜索，merge=True 时返回去重合并后的结果"""
         pass
 
+    def _search_until_target(self, subqueries: List[str], target_results: int, min_score: float, max_concurrency: int) -> Dict[str, Any]:
+        """按优先级（列表顺序）并发执行子查询，凑够目标数量的去重高分结果后停止派发
+        
+        Args:
+            subqueries: 按优先级排列的子查询列表
+            target_results: 目标结果数
+            min_score: 计入目标的最低分数
+            max_concurrency: 同时进行的子查询数
+            
+        Returns:
+            与 merge_results 相同结构的合并结果（queries 为已完成的子查询），stats 中额外包含：
+            dispatched（已发出）、completed（已完成并合并）、abandoned（已发出但提前结束时未等待，结果被丢弃，
+            请求仍会计费）、skipped（未发出）、target_met
+        
+        Raises:
+            ValueError: target_results 或 max_concurrency 不是正整数时
+        """
+        if not isinstance(target_results, int) or target_results <= 0:
+            raise ValueError(f"target_results 必须是正整数: {target_results!r}")
+        if not isinstance(max_concurrency, int) or max_concurrency <= 0:
+            raise ValueError(f"max_concurrency 必须是正整数: {max_concurrency!r}")
+
+        def _qualified(hit: Dict[str, Any]) -> bool:
+            score = hit.get("score")
+            return score >= min_score if isinstance(score, (int, float)) else min_score <= 0
+
+        deduplicator = ResultDeduplicator()
+        errors, completed = [], []
+        pending = {}
+        next_index = 0
+        target_met = False
+        executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="subquery-search")
+        try:
+            while True:
+                while not target_met and next_index < len(subqueries) and len(pending) < max_concurrency:
+                    query = subqueries[next_index]
+                    pending[executor.submit(self.search, query)] = query
+                    next_index += 1
+                if not pending:
+                    break
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    query = pending.pop(future)
+                    completed.append(query)
+                    try:
+                        payload = future.result()
+                    except Exception as e:
+                        payload = self._error_result(e, query)
+                    if isinstance(payload, dict) and "error" in payload:
+                        errors.append({"query": query, "error": payload["error"]})
+                    else:
+                        deduplicator.extend(extract_hits(payload, engine=self.name, query=query))
+                if not target_met and sum(1 for hit in deduplicator.results() if _qualified(hit)) >= target_results:
+                    # 已凑够结果：不再派发新的子查询，仍在进行的子查询不再等待
+                    target_met = True
+                    break
+        finally:
+            # 尚未开始的子查询被取消（不计入已发出），已在进行的子查询不再等待
+            cancelled = sum(1 for future in pending if future.cancel())
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        dispatched = next_index - cancelled
+        results = deduplicator.results()
+        stats = dict(deduplicator.stats, unique=len(results), dispatched=dispatched, completed=len(completed),
+                     abandoned=dispatched - len(completed), skipped=len(subqueries) - dispatched, target_met=target_met)
+        return {"queries": completed, "results": results, "errors": errors, "stats": stats}
+
+    def merge_results(self, payloads: List[Dict[str, Any]], queries: Optional[List[str]] = None) -> Dict[str, Any]:
+        """合并多个查询的结果：按规范化URL和SimHash内容相似度去重，保留分数最高的副本
+        
+        Args:
+            payloads: 每个查询的原始返回结果
+            queries: 与 payloads 对应的查询列表
+            
+        Returns:
+            {"queries", "results": [{title, url, content, score, engine, query}], "errors", "stats"}
+        """
+        return merge_results(payloads, queries, engine=self.name)
+
+    def search_hits(self, query: str) -> List[SearchHit]:
+        """search 的紧凑版本：返回各引擎统一结构的 SearchHit 列表（原文按需解压）
+        
+        Args:
+            query: 搜索查询字符串
+            
+        Returns:
+            SearchHit 列表，出错时返回空列表
+        """
+        return parse_hits(self.search(query), self.name)
+
+    async def asearch_hits(self, query: str) -> List[SearchHit]:
+        """search_hits 的异步版本"""
+        return parse_hits(await self.asearch(query), self.name)
+
+    @instrumented("asearch")
+    async def asearch(self, query: str) -> Dict[str, Any]:
+        """单个查询的异步搜索，默认在线程池中调用 search，支持原生异步的引擎应当重写"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, lambda: self.search(query))
+
+    async def search_stream(self, queries: List[str], max_concurrency: int = 5, timeout: Optional[float] = None) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """流式异步搜索：按完成顺序逐个产出 (query, result)
+        
+        下游可以在第一个结果返回后立即开始处理，不必等待最慢的查询。
+        
+        Args:
+            queries: 查询列表
+            max_concurrency: 初始并发请求数（之后由自适应限制器调整）
+            timeout: 单个查询的超时时间（秒），超时的查询产出错误结果
+            
+        Yields:
+            (查询字符串, 搜索结果字典)
+        """
+        limiter = self.concurrency_limiter(max_concurrency)
+
+        async def _search_one(query: str) -> Tuple[str, Dict[str, Any]]:
+            try:
+                if timeout is None:
+                    result = await limiter.run(lambda: self.asearch(query))
+                else:
+                    # 超时从真正发出请求时开始计算，不包含排队时间
+                    result = await limiter.run(lambda: asyncio.wait_for(self.asearch(query), timeout))
+            except asyncio.TimeoutError:
+                result = {"query": query, "error": f"查询超时（{timeout}秒）", "error_type": "TimeoutError"}
+            return query, result
+
+        tasks = [asyncio.ensure_future(_search_one(query)) for query in queries]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # 调用方提前结束迭代时取消剩余查询
+            for task in tasks:
+                task.cancel()
+
 # Tavily搜索引擎实现
 class TavilySearchEngine(SearchEngine):
-    def __init__(self, api_key: str):
+    name = "tavily"
+
+    def __init__(self, api_key: str, transport: Optional[HttpTransport] = None):
         """初始化Tavily搜索引擎
         
         Args:
             api_key: Tavily API密钥
+            transport: 共享的HTTP传输层，为None时使用TavilyClient自带的请求方式
         """
         self.client = TavilyClient(api_key=api_key)
+        self.transport = transport
+        self.search_url = "https://api.tavily.com/search"
+        self.headers = {
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json",
+        }
+    
+    def _fetch(self, query: str) -> Dict[str, Any]:
+        """发起一次Tavily请求：有传输层时直接调用REST接口以复用连接池"""
+        if self.transport is None:
+            return self.client.search(query)
+        return self.transport.post_json(self.search_url, self.headers, {"query": query})
+    
+    def _search_raw(self, query: str) -> Dict[str, Any]:
+        """执行一次Tavily搜索（经过缓存与在途请求合并），出错时抛出异常"""
+        return self._call("search", query, None, lambda: self._fetch(query))
     
+    def get_transport_stats(self) -> Dict[str, Any]:
+        """获取连接池统计信息"""
+        return self.transport.get_stats() if self.transport is not None else {}
+    
+    @instrumented("search")
     def search(self, query: str) -> Dict[str, Any]:
         """常规搜索方法
         
@@ -99,80 +952,128 @@ class TavilySearchEngine(SearchEngine):
             搜索结果字典
         """
         try:
-            response = self.client.search(query)
+            response = self._search_raw(query)
             return response
         except Exception as e:
             print(f"搜索出错: {e}")
-            return {"error": str(e)}
+            return self._error_result(e)
     
-    def search_with_subqueries(self, subqueries: List[str]) -> List[Dict[str, Any]]:
+    @instrumented("search_with_subqueries")
+    def search_with_subqueries(self, subqueries: List[str], merge: bool = False, target_results: Optional[int] = None,
+                               min_score: float = 0.0, max_concurrency: int = 3) -> Union[List[Dict[str, Any]], Dict[str, Any]]:
         """将查询拆分为较小的子查询进行搜索
         
         Args:
             subqueries: 子查询列表
+            merge: 是否把所有子查询的结果去重合并为一个列表
+            target_results: 目标结果数，指定后按顺序并发执行子查询，去重后分数不低于 min_score 的结果
+                达到目标时跳过剩余子查询，并返回合并结果
+            min_score: 计入目标的最低分数（没有分数的结果只在 min_score 为0时计入）
+            max_concurrency: 提前结束模式下同时进行的子查询数
             
         Returns:
-            搜索结果列表
+            搜索结果列表，merge=True 或指定 target_results 时为合并结果
+        
+        Raises:
+            ValueError: 指定 target_results 时 target_results 或 max_concurrency 不是正整数
         """
+        if target_results is not None:
+            return self._search_until_target(subqueries, target_results, min_score, max_concurrency)
         results = []
         for query in subqueries:
             try:
-                result = self.client.search(query)
+                result = self._search_raw(query)
                 results.append(result)
             except Exception as e:
                 print(f"子查询 '{query}' 搜索出错: {e}")
-                results.append({"query": query, "error": str(e)})
-        return results
+                results.append(self._error_result(e, query))
+        return self.merge_results(results, subqueries) if merge else results
     
-    async def search_async(self, queries: List[str], max_concurrency: int = 5) -> List[Dict[str, Any]]:
+    @instrumented("search_async")
+    async def search_async(self, queries: List[str], max_concurrency: int = 5, merge: bool = False) -> Union[List[Dict[str, Any]], Dict[str, Any]]:
         """异步搜索多个查询
         
         Args:
             queries: 查询列表
-            max_concurrency: 最大并发请求数
+            max_concurrency: 初始并发请求数（之后由自适应限制器调整）
+            merge: 是否把所有查询的结果去重合并为一个列表
             
         Returns:
-            搜索结果列表
+            搜索结果列表，merge=True 时为 merge_results 的合并结果
         """
         async def _search_one(query: str) -> Dict[str, Any]:
             try:
                 loop = asyncio.get_event_loop()
                 # 在异步环境中调用同步方法
-                result = await loop.run_in_executor(None, lambda: self.client.search(query))
+                result = await loop.run_in_executor(None, lambda: self._search_raw(query))
                 return result
             except Exception as e:
                 print(f"异步查询 '{query}' 搜索出错: {e}")
-                return {"query": query, "error": str(e)}
+                return self._error_result(e, query)
         
-        # 限制并发请求数
-        semaphore = asyncio.Semaphore(max_concurrency)
-        
-        async def _search_with_limit(query: str) -> Dict[str, Any]:
-            async with semaphore:
-                return await _search_one(query)
-        
-        # 并发执行所有查询
-        tasks = [_search_with_limit(query) for query in queries]
-        results = await asyncio.gather(*tasks)
-        return results
+        # 自适应并发：延迟平稳时逐步提高并发，遇到429/5xx/超时时退避
+        results = await self._gather_adaptive(queries, max_concurrency, _search_one)
+        return self.merge_results(results, queries) if merge else results
 
 # Jina搜索引擎实现
 class JinaSearchEngine(SearchEngine):
-    def __init__(self, api_key: str):
+    name = "jina"
+
+    def __init__(self, api_key: str, transport: Optional[HttpTransport] = None, async_transport: Optional[AsyncHttpTransport] = None,
+                 page_cache: Optional[PageCache] = None):
         """初始化Jina搜索引擎
         
         Args:
             api_key: Jina API密钥
+            transport: 同步HTTP传输层，为None时创建独立的连接池
+            async_transport: 异步HTTP传输层，为None时创建独立的连接池
+            page_cache: 网页内容缓存，供 read_webpages 使用
         """
         self.api_key = api_key
         self.search_url = "https://s.jina.ai/"
+        self.reader_url = "https://r.jina.ai/"
+        self.rerank_url = "https://api.jina.ai/v1/rerank"
+        # 单次重排序请求的文档数上限，以及每个文档的最大字符数（None表示不截断）
+        self.rerank_max_documents = 1024
+        self.rerank_max_doc_chars: Optional[int] = None
+        # 本地重排序器，重排序API不可用时使用
+        self.local_reranker = LocalReranker()
         self.headers = {
             "Authorization": f"Bearer {api_key}",
             "Content-Type": "application/json",
             "Accept": "application/json",
             "X-No-Cache": "true"
         }
+        self.transport = transport or HttpTransport()
+        self.async_transport = async_transport or AsyncHttpTransport()
+        self.page_cache = page_cache
+    
+    def _site_headers(self, site: str) -> Dict[str, str]:
+        """站内搜索使用的请求头"""
+        headers = self.headers.copy()
+        headers["X-Site"] = site
+        return headers
+    
+    def _reader_headers(self) -> Dict[str, str]:
+        """网页读取使用的请求头"""
+        headers = self.headers.copy()
+        headers["X-With-Links-Summary"] = "true"
+        headers["X-With-Images-Summary"] = "true"
+        return headers
+    
+    @staticmethod
+    def _rerank_payload(query: str, documents: List[str], model: str, top_n: Optional[int]) -> Dict[str, Any]:
+        """构建重排序请求体"""
+        payload = {
+            "model": model,
+            "query": query,
+            "documents": documents,
+        }
+        if top_n:
+            payload["top_n"] = top_n
+        return payload
     
+    @instrumented("search")
     def search(self, query: str, options: str = "Default") -> Dict[str, Any]:
         """执行Jina搜索查询
         
@@ -189,17 +1090,15 @@ class JinaSearchEngine(SearchEngine):
                 "options": options
             }
             
-            response = requests.post(
-                self.search_url, 
-                headers=self.headers,
-                json=payload
+            return self._call(
+                "search", query, {"options": options},
+                lambda: self.transport.post_json(self.search_url, self.headers, payload)
             )
-            response.raise_for_status()
-            return response.json()
         except Exception as e:
             print(f"Jina搜索出错: {e}")
-            return {"error": str(e)}
+            return self._error_result(e)
     
+    @instrumented("search_with_site")
     def search_with_site(self, query: str, site: str, options: str = "Default") -> Dict[str, Any]:
         """在指定网站内执行Jina搜索查询
         
@@ -212,34 +1111,91 @@ class JinaSearchEngine(SearchEngine):
             搜索结果字典
         """
         try:
-            headers = self.headers.copy()
-            headers["X-Site"] = site
+            headers = self._site_headers(site)
             
             payload = {
                 "q": query,
                 "options": options
             }
             
-            response = requests.post(
-                self.search_url, 
-                headers=headers,
-                json=payload
+            return self._call(
+                "search_with_site", query, {"site": site, "options": options},
+                lambda: self.transport.post_json(self.search_url, headers, payload)
             )
-            response.raise_for_status()
-            return response.json()
         except Exception as e:
             print(f"Jina站内搜索出错: {e}")
-            return {"error": str(e)}
+            return self._error_result(e)
     
-    def search_with_subqueries(self, subqueries: List[str]) -> List[Dict[str, Any]]:
+    @instrumented("asearch")
+    async def asearch(self, query: str, options: str = "Default") -> Dict[str, Any]:
+        """search 的原生异步版本，通过共享连接池发送请求
+        
+        Args:
+            query: 搜索查询字符串
+            options: 输出格式选项
+            
+        Returns:
+            搜索结果字典
+        """
+        try:
+            payload = {
+                "q": query,
+                "options": options
+            }
+            return await self._acall(
+                "search", query, {"options": options},
+                lambda: self.async_transport.post_json(self.search_url, self.headers, payload)
+            )
+        except Exception as e:
+            print(f"Jina异步搜索出错: {e}")
+            return self._error_result(e)
+    
+    @instrumented("asearch_with_site")
+    async def asearch_with_site(self, query: str, site: str, options: str = "Default") -> Dict[str, Any]:
+        """search_with_site 的原生异步版本
+        
+        Args:
+            query: 搜索查询字符串
+            site: 限制搜索的网站域名
+            options: 输出格式选项
+            
+        Returns:
+            搜索结果字典
+        """
+        try:
+            payload = {
+                "q": query,
+                "options": options
+            }
+            return await self._acall(
+                "search_with_site", query, {"site": site, "options": options},
+                lambda: self.async_transport.post_json(self.search_url, self._site_headers(site), payload)
+            )
+        except Exception as e:
+            print(f"Jina异步站内搜索出错: {e}")
+            return self._error_result(e)
+    
+    @instrumented("search_with_subqueries")
+    def search_with_subqueries(self, subqueries: List[str], merge: bool = False, target_results: Optional[int] = None,
+                               min_score: float = 0.0, max_concurrency: int = 3) -> Union[List[Dict[str, Any]], Dict[str, Any]]:
         """将查询拆分为较小的子查询进行搜索
         
         Args:
             subqueries: 子查询列表
+            merge: 是否把所有子查询的结果去重合并为一个列表
+            target_results: 目标结果数，指定后按顺序并发执行子查询，去重后分数不低于 min_score 的结果
+                达到目标时跳过剩余子查询，并返回合并结果
+            min_score: 计入目标的最低分数（没有分数的结果只在 min_score 为0时计入）
+            max_concurrency: 提前结束模式下同时进行的子查询数
             
         Returns:
-            搜索结果列表
+            搜索结果列表，merge=True 或指定 target_results 时为合并结果
+        
+        Raises:
+            ValueError: 指定 target_results 时 target_results 或 max_concurrency 不是正整数
         """
+        if target_results is not None:
+            return self._search_until_target(subqueries, target_results, min_score, max_concurrency)
         results = []
         for query in subqueries:
             try:
@@ -247,41 +1203,34 @@ class JinaSearchEngine(SearchEngine):
                 results.append(result)
             except Exception as e:
                 print(f"Jina子查询 '{query}' 搜索出错: {e}")
-                results.append({"query": query, "error": str(e)})
-        return results
+                results.append(self._error_result(e, query))
+        return self.merge_results(results, subqueries) if merge else results
     
-    async def search_async(self, queries: List[str], max_concurrency: int = 5) -> List[Dict[str, Any]]:
+    @instrumented("search_async")
+    async def search_async(self, queries: List[str], max_concurrency: int = 5, merge: bool = False) -> Union[List[Dict[str, Any]], Dict[str, Any]]:
         """异步搜索多个查询
         
         Args:
             queries: 查询列表
-            max_concurrency: 最大并发请求数
+            max_concurrency: 初始并发请求数（之后由自适应限制器调整）
+            merge: 是否把所有查询的结果去重合并为一个列表
             
         Returns:
-            搜索结果列表
+            搜索结果列表，merge=True 时为 merge_results 的合并结果
         """
         async def _search_one(query: str) -> Dict[str, Any]:
             try:
-                loop = asyncio.get_event_loop()
-                # 在异步环境中调用同步方法
-                result = await loop.run_in_executor(None, lambda: self.search(query))
-                return result
+                # 直接使用异步连接池，不再占用线程池
+                return await self.asearch(query)
             except Exception as e:
                 print(f"Jina异步查询 '{query}' 搜索出错: {e}")
-                return {"query": query, "error": str(e)}
-        
-        # 限制并发请求数
-        semaphore = asyncio.Semaphore(max_concurrency)
+                return self._error_result(e, query)
         
-        async def _search_with_limit(query: str) -> Dict[str, Any]:
-            async with semaphore:
-                return await _search_one(query)
-        
-        # 并发执行所有查询
-        tasks = [_search_with_limit(query) for query in queries]
-        results = await asyncio.gather(*tasks)
-        return results
+        # 自适应并发：延迟平稳时逐步提高并发，遇到429/5xx/超时时退避
+        results = await self._gather_adaptive(queries, max_concurrency, _search_one)
+        return self.merge_results(results, queries) if merge else results
         
+    @instrumented("read_webpage")
     def read_webpage(self, url: str, options: str = "Default") -> Dict[str, Any]:
         """使用Jina Reader API获取网页内容
         
@@ -293,28 +1242,126 @@ class JinaSearchEngine(SearchEngine):
             网页内容字典
         """
         try:
-            reader_url = "https://r.jina.ai/"
             payload = {
                 "url": url,
                 "options": options
             }
             
-            headers = self.headers.copy()
-            headers["X-With-Links-Summary"] = "true"
-            headers["X-With-Images-Summary"] = "true"
-            
-            response = requests.post(
-                reader_url, 
-                headers=headers,
-                json=payload
-            )
-            response.raise_for_status()
-            return response.json()
+            return self._resilient(lambda: self.transport.post_json(self.reader_url, self._reader_headers(), payload))
         except Exception as e:
             print(f"Jina网页读取出错: {e}")
-            return {"error": str(e)}
+            return self._error_result(e)
+    
+    @instrumented("aread_webpage")
+    async def aread_webpage(self, url: str, options: str = "Default") -> Dict[str, Any]:
+        """read_webpage 的原生异步版本
+        
+        Args:
+            url: 要读取的网页URL
+            options: 输出格式选项
+            
+        Returns:
+            网页内容字典
+        """
+        try:
+            payload = {
+                "url": url,
+                "options": options
+            }
+            return await self._aresilient(lambda: self.async_transport.post_json(self.reader_url, self._reader_headers(), payload))
+        except Exception as e:
+            print(f"Jina异步网页读取出错: {e}")
+            return self._error_result(e)
+            
+    @instrumented("read_webpages")
+    async def read_webpages(self, urls: List[str], options: str = "Default", max_concurrency: int = 20, per_host: int = 4,
+                            fetch_validators: bool = False) -> List[Dict[str, Any]]:
+        """并发批量读取网页
+        
+        配置了 page_cache 时：新鲜的缓存直接返回；过期的缓存先用 ETag/Last-Modified
+        向源站发送条件GET，返回304则复用本地内容，否则重新通过Jina Reader读取。
+        缓存的读写在线程池中执行，不阻塞事件循环。
+        
+        Args:
+            urls: 网页URL列表（重复的URL只读取一次）
+            options: 输出格式选项
+            max_concurrency: 总并发数
+            per_host: 每个源站主机的最大并发数
+            fetch_validators: 首次读取时是否额外向源站请求 ETag/Last-Modified（会增加一次源站请求），
+                不获取时过期的缓存直接重新读取
             
-    def rerank(self, query: str, documents: List[str], model: str = "jina-reranker-v2-base-multilingual", top_n: int = None) -> Dict[str, Any]:
+        Returns:
+            网页内容字典列表，顺序与 urls 一致
+        """
+        total_semaphore = asyncio.Semaphore(max_concurrency)
+        host_semaphores: Dict[str, asyncio.Semaphore] = {}
+        
+        async def _read_one(url: str) -> Dict[str, Any]:
+            host = urlsplit(url).netloc.lower()
+            host_semaphore = host_semaphores.setdefault(host, asyncio.Semaphore(per_host))
+            async with host_semaphore, total_semaphore:
+                try:
+                    return await self._read_with_page_cache(url, options, fetch_validators)
+                except Exception as e:
+                    print(f"Jina批量网页读取 '{url}' 出错: {e}")
+                    return self._error_result(e)
+        
+        unique_urls = list(dict.fromkeys(urls))
+        pages = dict(zip(unique_urls, await asyncio.gather(*[_read_one(url) for url in unique_urls])))
+        return [pages[url] for url in urls]
+    
+    async def _read_with_page_cache(self, url: str, options: str, fetch_validators: bool = False) -> Dict[str, Any]:
+        """读取单个网页，按需使用缓存和条件GET"""
+        cache = self.page_cache
+        if cache is None:
+            return await self.aread_webpage(url, options)
+        
+        entry = await asyncio.to_thread(cache.get, url, options)
+        if entry is not None and entry["fresh"]:
+            cache.record("fresh_hits")
+            return entry["body"]
+        
+        etag = last_modified = None
+        if entry is not None and (entry["etag"] or entry["last_modified"]):
+            headers = {}
+            if entry["etag"]:
+                headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                headers["If-Modified-Since"] = entry["last_modified"]
+            # 条件请求失败或源站未返回校验信息时保留原有的校验信息
+            etag, last_modified = entry["etag"], entry["last_modified"]
+            try:
+                status, new_etag, new_last_modified = await self.async_transport.conditional_get(url, headers)
+                if status == 304:
+                    await asyncio.to_thread(cache.touch, url, options)
+                    cache.record("revalidated")
+                    return entry["body"]
+                if new_etag or new_last_modified:
+                    etag, last_modified = new_etag, new_last_modified
+            except Exception as e:
+                print(f"网页条件请求 '{url}' 出错: {e}")
+            body = await self.aread_webpage(url, options)
+        elif fetch_validators:
+            # 首次读取时同时向源站获取校验信息，供下次条件请求使用
+            async def _validators() -> Tuple[Optional[str], Optional[str]]:
+                try:
+                    _, tag, modified = await self.async_transport.conditional_get(url, {})
+                    return tag, modified
+                except Exception:
+                    return None, None
+            body, (etag, last_modified) = await asyncio.gather(self.aread_webpage(url, options), _validators())
+        else:
+            body = await self.aread_webpage(url, options)
+        
+        if "error" in body:
+            # 读取失败时退回到过期的缓存内容
+            return entry["body"] if entry is not None else body
+        await asyncio.to_thread(cache.put, url, body, options, etag, last_modified)
+        cache.record("refetched" if entry is not None else "misses")
+        return body
+    
+    @instrumented("rerank")
+    def rerank(self, query: str, documents: List[str], model: str = "jina-reranker-v2-base-multilingual", top_n: int = None, timeout: Optional[float] = None) -> Dict[str, Any]:
         """使用Jina重排序API对搜索结果进行重排序
         
         Args:
@@ -322,33 +1369,49 @@ class JinaSearchEngine(SearchEngine):
             documents: 要重排序的文档列表
             model: 使用的模型名称
             top_n: 返回的结果数量
+            timeout: 请求超时时间（秒），为None时使用传输层的默认超时
             
         Returns:
             重排序结果字典
         """
         try:
-            rerank_url = "https://api.jina.ai/v1/rerank"
-            payload = {
-                "model": model,
-                "query": query,
-                "documents": documents,
-            }
-            
-            if top_n:
-                payload["top_n"] = top_n
-                
-            response = requests.post(
-                rerank_url, 
-                headers=self.headers,
-                json=payload
-            )
-            response.raise_for_status()
-            return response.json()
+            payload = self._rerank_payload(query, documents, model, top_n)
+            return self.transport.post_json(self.rerank_url, self.headers, payload, timeout=timeout)
         except Exception as e:
             print(f"Jina重排序出错: {e}")
-            return {"error": str(e)}
+            return self._error_result(e)
+    
+    @instrumented("arerank")
+    async def arerank(self, query: str, documents: List[str], model: str = "jina-reranker-v2-base-multilingual", top_n: int = None) -> Dict[str, Any]:
+        """rerank 的原生异步版本
+        
+        Args:
+            query: 搜索查询
+            documents: 要重排序的文档列表
+            model: 使用的模型名称
+            top_n: 返回的结果数量
             
-    def deep_search(self, query: str, options: str = "Markdown", rerank: bool = True, model: str = "jina-reranker-v2-base-multilingual", top_n: int = 3) -> Dict[str, Any]:
+        Returns:
+            重排序结果字典
+        """
+        try:
+            payload = self._rerank_payload(query, documents, model, top_n)
+            return await self.async_transport.post_json(self.rerank_url, self.headers, payload)
+        except Exception as e:
+            print(f"Jina异步重排序出错: {e}")
+            return self._error_result(e)
+    
+    async def aclose(self) -> None:
+        """关闭异步连接池"""
+        await self.async_transport.aclose()
+    
+    def get_transport_stats(self) -> Dict[str, Any]:
+        """获取同步连接池统计信息"""
+        return self.transport.get_stats()
+            
+    @instrumented("deep_search")
+    def deep_search(self, query: str, options: str = "Markdown", rerank: bool = True, model: str = "jina-reranker-v2-base-multilingual", top_n: int = 3,
+                    reranker: str = "auto", rerank_timeout: Optional[float] = None) -> Dict[str, Any]:
         """执行深度搜索: 搜索 + 重排序
         
         Args:
@@ -357,6 +1420,8 @@ class JinaSearchEngine(SearchEngine):
             rerank: 是否进行重排序
             model: 重排序使用的模型
             top_n: 返回的结果数量
+            reranker: "api" 只用重排序API，"local" 只用本地BM25，"auto" 先用API，出错或超时时改用本地
+            rerank_timeout: 重排序API的超时时间（秒）
             
         Returns:
             深度搜索结果
@@ -382,34 +1447,456 @@ class JinaSearchEngine(SearchEngine):
                 return search_results
             
             # 执行重排序
-            rerank_results = self.rerank(query, documents, model, top_n)
+            rerank_results = self._rerank_with_fallback(query, documents, model, top_n, reranker, rerank_timeout)
             
             # 如果重排序出错，返回原始搜索结果
             if "error" in rerank_results:
                 return search_results
             
-            # 构建最终结果
-            final_results = {
-                "original_search": search_results,
-                "reranked_results": rerank_results,
-                "top_results": []
-            }
-            
-            # 根据重排序结果排列文档
-            for result in rerank_results.get("results", []):
-                idx = result.get("index")
-                if idx is not None and idx < len(search_results.get("data", [])):
-                    original_doc = search_results["data"][idx]
-                    final_results["top_results"].append({
-                        "document": original_doc,
-                        "relevance_score": result.get("relevance_score")
-                    })
-            
-            return final_results
+            return self._build_deep_results(search_results, rerank_results)
         
         except Exception as e:
             print(f"Jina深度搜索出错: {e}")
-            return {"error": str(e)}
+            return self._error_result(e)
+    
+    def _rerank_with_fallback(self, query: str, documents: List[str], model: str, top_n: Optional[int], reranker: str, timeout: Optional[float]) -> Dict[str, Any]:
+        """按 reranker 策略选择重排序API或本地重排序"""
+        if reranker == "local":
+            return self.local_reranker.rerank(query, documents, top_n)
+        rerank_results = self.rerank(query, documents, model, top_n, timeout=timeout)
+        if "error" in rerank_results and reranker == "auto":
+            return self.local_reranker.rerank(query, documents, top_n)
+        return rerank_results
+    
+    async def _arerank_with_fallback(self, query: str, documents: List[str], model: str, top_n: Optional[int], reranker: str, timeout: Optional[float]) -> Dict[str, Any]:
+        """_rerank_with_fallback 的异步版本，API请求超过 timeout 时直接改用本地重排序"""
+        if reranker == "local":
+            return self.local_reranker.rerank(query, documents, top_n)
+        try:
+            rerank_results = await asyncio.wait_for(self.arerank_packed(query, documents, model, top_n), timeout)
+        except asyncio.TimeoutError as e:
+            rerank_results = self._error_result(e)
+        if "error" in rerank_results and reranker == "auto":
+            return self.local_reranker.rerank(query, documents, top_n)
+        return rerank_results
+    
+    @staticmethod
+    def _build_deep_results(search_results: Dict[str, Any], rerank_results: Dict[str, Any]) -> Dict[str, Any]:
+        """根据重排序结果排列原始搜索文档，构建深度搜索的最终结果"""
+        final_results = {
+            "original_search": search_results,
+            "reranked_results": rerank_results,
+            "top_results": []
+        }
+        
+        # 根据重排序结果排列文档
+        for result in rerank_results.get("results", []):
+            idx = result.get("index")
+            if idx is not None and idx < len(search_results.get("data", [])):
+                original_doc = search_results["data"][idx]
+                final_results["top_results"].append({
+                    "document": original_doc,
+                    "relevance_score": result.get("relevance_score")
+                })
+        
+        return final_results
+    
+    @instrumented("arerank_packed")
+    async def arerank_packed(self, query: str, documents: List[str], model: str = "jina-reranker-v2-base-multilingual", top_n: int = None) -> Dict[str, Any]:
+        """按API的单次文档数上限拆分重排序请求，并发发送后合并结果
+        
+        Args:
+            query: 搜索查询
+            documents: 要重排序的文档列表
+            model: 使用的模型名称
+            top_n: 返回的结果数量
+            
+        Returns:
+            与 rerank 相同结构的重排序结果，index 对应 documents 中的位置
+        """
+        if self.rerank_max_doc_chars:
+            documents = [document[:self.rerank_max_doc_chars] for document in documents]
+        size = self.rerank_max_documents
+        if len(documents) <= size:
+            return await self.arerank(query, documents, model, top_n)
+        
+        offsets = list(range(0, len(documents), size))
+        chunks = await asyncio.gather(*[
+            self.arerank(query, documents[offset:offset + size], model, top_n) for offset in offsets
+        ])
+        merged = []
+        for offset, chunk in zip(offsets, chunks):
+            if "error" in chunk:
+                return chunk
+            for result in chunk.get("results", []):
+                merged.append({**result, "index": result.get("index", 0) + offset})
+        merged.sort(key=lambda result: result.get("relevance_score") or 0.0, reverse=True)
+        return {"model": model, "results": merged[:top_n] if top_n else merged}
+    
+    @instrumented("deep_search_batch")
+    async def deep_search_batch(self, queries: List[str], options: str = "Markdown", rerank: bool = True, model: str = "jina-reranker-v2-base-multilingual", top_n: int = 3,
+                                max_concurrency: int = 5, rerank_concurrency: int = 5, reranker: str = "auto", rerank_timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        """批量深度搜索：搜索与重排序流水线执行
+        
+        每个查询完成搜索后立即释放搜索并发名额，进入重排序阶段，
+        因此第 N+1 个查询的搜索与第 N 个查询的重排序是重叠进行的。
+        
+        Args:
+            queries: 查询列表
+            options: 输出格式选项
+            rerank: 是否进行重排序
+            model: 重排序使用的模型
+            top_n: 每个查询返回的结果数量
+            max_concurrency: 搜索阶段的初始并发数（之后由自适应限制器调整）
+            rerank_concurrency: 重排序阶段的最大并发数
+            reranker: 重排序策略，同 deep_search
+            rerank_timeout: 重排序API的超时时间（秒）
+            
+        Returns:
+            与 deep_search 结构相同的结果列表，顺序与 queries 一致
+        """
+        search_limiter = self.concurrency_limiter(max_concurrency)
+        rerank_semaphore = asyncio.Semaphore(rerank_concurrency)
+        
+        async def _deep_one(query: str) -> Dict[str, Any]:
+            try:
+                # 搜索阶段
+                search_results = await search_limiter.run(lambda: self.asearch(query, options))
+                if "error" in search_results or not rerank:
+                    return search_results
+                
+                documents = [item.get("content", "") for item in search_results.get("data", [])]
+                if not documents:
+                    return search_results
+                
+                # 重排序阶段
+                async with rerank_semaphore:
+                    rerank_results = await self._arerank_with_fallback(query, documents, model, top_n, reranker, rerank_timeout)
+                if "error" in rerank_results:
+                    return search_results
+                return self._build_deep_results(search_results, rerank_results)
+            except Exception as e:
+                print(f"Jina批量深度搜索 '{query}' 出错: {e}")
+                return self._error_result(e, query)
+        
+        return list(await asyncio.gather(*[_deep_one(query) for query in queries]))
+
+# 联合搜索引擎实现
+class FederatedSearchEngine(SearchEngine):
+    """联合搜索引擎：把同一个查询发送给多个后端
+
+    - mode="first": 先请求主引擎，主引擎耗时超过其历史延迟分位数时向下一个引擎发送对冲请求，
+      返回最先成功的结果
+    - mode="merge": 同时请求所有引擎，在超时前合并全部成功结果并按URL去重
+    两种模式都返回统一的结构: {"query", "results": [{title, url, content, score, engine}], "engines"}
+    """
+    name = "federated"
+
+    def __init__(self,
+                 engines: List[SearchEngine],
+                 mode: str = "first",
+                 hedge_percentile: float = 0.95,
+                 hedge_delay: float = 2.0,
+                 timeout: float = 30.0,
+                 min_samples: int = 10,
+                 history_size: int = 200):
+        """初始化联合搜索引擎
+        
+        Args:
+            engines: 后端搜索引擎列表，第一个为主引擎
+            mode: "first" 返回最先成功的结果，"merge" 合并所有结果
+            hedge_percentile: 触发对冲请求的延迟分位数（0-1）
+            hedge_delay: 样本不足时使用的对冲等待时间（秒）
+            timeout: 单次查询的总超时时间（秒）
+            min_samples: 使用分位数前至少需要的延迟样本数
+            history_size: 每个引擎保留的延迟样本数
+        """
+        if not engines:
+            raise ValueError("联合搜索至少需要一个后端搜索引擎")
+        if mode not in ("first", "merge"):
+            raise ValueError(f"不支持的联合搜索模式: {mode}")
+        self.engines = engines
+        self.mode = mode
+        self.hedge_percentile = hedge_percentile
+        self.hedge_delay = hedge_delay
+        self.timeout = timeout
+        self.min_samples = min_samples
+        self._latencies = {id(engine): deque(maxlen=history_size) for engine in engines}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max(4, 4 * len(engines)), thread_name_prefix="federated-search")
+        self.stats = {"queries": 0, "hedged": 0, "failures": 0}
+
+    def _record_latency(self, engine: SearchEngine, elapsed: float) -> None:
+        with self._lock:
+            self._latencies[id(engine)].append(elapsed)
+
+    def get_hedge_delay(self, engine: SearchEngine) -> float:
+        """根据引擎历史延迟计算对冲等待时间
+        
+        Args:
+            engine: 后端搜索引擎
+            
+        Returns:
+            等待时间（秒），样本不足时返回 hedge_delay
+        """
+        with self._lock:
+            samples = sorted(self._latencies[id(engine)])
+        if len(samples) < self.min_samples:
+            return self.hedge_delay
+        index = min(len(samples) - 1, int(self.hedge_percentile * len(samples)))
+        return samples[index]
+
+    def _timed_search(self, engine: SearchEngine, query: str, started: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+        """调用后端引擎并记录成功请求的延迟
+
+        Args:
+            engine: 后端搜索引擎
+            query: 搜索查询字符串
+            started: 传入时写入请求实际开始执行的时间（time.monotonic），用于从开始执行时计算对冲等待
+        """
+        if started is not None:
+            started["at"] = time.monotonic()
+        start = time.perf_counter()
+        result = engine.search(query)
+        if isinstance(result, dict) and "error" not in result:
+            self._record_latency(engine, time.perf_counter() - start)
+        return result
+
+    async def _atimed_search(self, engine: SearchEngine, query: str) -> Dict[str, Any]:
+        """_timed_search 的异步版本"""
+        start = time.perf_counter()
+        result = await engine.asearch(query)
+        if isinstance(result, dict) and "error" not in result:
+            self._record_latency(engine, time.perf_counter() - start)
+        return result
+
+    def _merge(self, query: str, responses: List[tuple]) -> Dict[str, Any]:
+        """按URL去重合并多个引擎的结果，使用倒数排名融合(RRF)排序
+        
+        Args:
+            query: 查询字符串
+            responses: (engine, result) 列表
+            
+        Returns:
+            统一结构的搜索结果
+        """
+        merged: Dict[str, Dict[str, Any]] = {}
+        fused: Dict[str, float] = {}
+        for engine, result in responses:
+            # 保留原文，search_hits 可按需取得
+            for rank, hit in enumerate(extract_hits(result, engine.name, query, include_raw=True)):
+                key = canonical_url(hit["url"])
+                fused[key] = fused.get(key, 0.0) + 1.0 / (60 + rank)
+                if key not in merged:
+                    merged[key] = hit
+                elif merged[key].get("score") is None and hit.get("score") is not None:
+                    merged[key] = hit
+        ordered = sorted(merged, key=lambda key: fused[key], reverse=True)
+        return {
+            "query": query,
+            "results": [merged[key] for key in ordered],
+            "engines": [engine.name for engine, _ in responses],
+        }
+
+    def _error(self, query: str, errors: List[str]) -> Dict[str, Any]:
+        with self._lock:
+            self.stats["failures"] += 1
+        return {"query": query, "error": "所有搜索引擎均失败: " + "; ".join(errors)}
+
+    @instrumented("search")
+    def search(self, query: str) -> Dict[str, Any]:
+        """联合搜索
+        
+        Args:
+            query: 搜索查询字符串
+            
+        Returns:
+            统一结构的搜索结果字典
+        """
+        with self._lock:
+            self.stats["queries"] += 1
+        deadline = time.monotonic() + self.timeout
+        futures = {}
+        errors = []
+        successes = []
+
+        if self.mode == "merge":
+            for engine in self.engines:
+                futures[self._executor.submit(self._timed_search, engine, query)] = engine
+            done, _ = wait(futures, timeout=self.timeout)
+            for future in done:
+                result = future.result()
+                if "error" in result:
+                    errors.append(f"{futures[future].name}: {result['error']}")
+                else:
+                    successes.append((futures[future], result))
+            if not successes:
+                return self._error(query, errors or ["超时"])
+            # 按后端顺序合并，保证主引擎的排名优先
+            successes.sort(key=lambda item: self.engines.index(item[0]))
+            return self._merge(query, successes)
+
+        # first 模式：先请求主引擎，超过延迟分位数或失败时再请求下一个引擎
+        pending_engines = list(self.engines)
+        # 最近一次发出的请求实际开始执行的时间：线程池繁忙时请求会排队，对冲等待从开始执行时算起
+        started: List[Dict[str, float]] = []
+
+        def _launch() -> None:
+            engine = pending_engines.pop(0)
+            started.append({})
+            futures[self._executor.submit(self._timed_search, engine, query, started[-1])] = engine
+
+        _launch()
+        while futures:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            newest = list(futures.values())[-1]
+            hedge_delay = self.get_hedge_delay(newest)
+            if pending_engines:
+                hedge_at = started[-1].get("at", time.monotonic()) + hedge_delay
+                wait_time = min(remaining, max(0.0, hedge_at - time.monotonic()))
+            else:
+                wait_time = remaining
+            done, _ = wait(list(futures), timeout=wait_time, return_when=FIRST_COMPLETED)
+            for future in done:
+                engine = futures.pop(future)
+                result = future.result()
+                if "error" in result:
+                    errors.append(f"{engine.name}: {result['error']}")
+                else:
+                    return self._merge(query, [(engine, result)])
+            if pending_engines and not futures:
+                # 在途请求均已失败，请求下一个引擎
+                _launch()
+            elif pending_engines and not done:
+                started_at = started[-1].get("at")
+                if started_at is not None and time.monotonic() - started_at >= hedge_delay:
+                    # 在途请求开始执行后超过延迟分位数仍未返回，发送对冲请求
+                    with self._lock:
+                        self.stats["hedged"] += 1
+                    _launch()
+        return self._error(query, errors or ["超时"])
+
+    @instrumented("asearch")
+    async def asearch(self, query: str) -> Dict[str, Any]:
+        """search 的异步版本
+        
+        Args:
+            query: 搜索查询字符串
+            
+        Returns:
+            统一结构的搜索结果字典
+        """
+        with self._lock:
+            self.stats["queries"] += 1
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout
+        tasks = {}
+        errors = []
+
+        if self.mode == "merge":
+            for engine in self.engines:
+                tasks[asyncio.ensure_future(self._atimed_search(engine, query))] = engine
+            done, pending = await asyncio.wait(tasks, timeout=self.timeout)
+            for task in pending:
+                task.cancel()
+            successes = []
+            for task in done:
+                result = task.result()
+                if "error" in result:
+                    errors.append(f"{tasks[task].name}: {result['error']}")
+                else:
+                    successes.append((tasks[task], result))
+            if not successes:
+                return self._error(query, errors or ["超时"])
+            successes.sort(key=lambda item: self.engines.index(item[0]))
+            return self._merge(query, successes)
+
+        pending_engines = list(self.engines)
+
+        def _launch() -> None:
+            engine = pending_engines.pop(0)
+            tasks[asyncio.ensure_future(self._atimed_search(engine, query))] = engine
+
+        _launch()
+        try:
+            while tasks:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                newest = list(tasks.values())[-1]
+                wait_time = min(remaining, self.get_hedge_delay(newest)) if pending_engines else remaining
+                done, _ = await asyncio.wait(list(tasks), timeout=wait_time, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    engine = tasks.pop(task)
+                    result = task.result()
+                    if "error" in result:
+                        errors.append(f"{engine.name}: {result['error']}")
+                    else:
+                        return self._merge(query, [(engine, result)])
+                if pending_engines and (not done or not tasks):
+                    if not done:
+                        # 在途请求超过延迟分位数仍未返回，发送对冲请求
+                        with self._lock:
+                            self.stats["hedged"] += 1
+                    _launch()
+        finally:
+            # 取消仍在进行的对冲请求
+            for task in tasks:
+                task.cancel()
+        return self._error(query, errors or ["超时"])
+
+    @instrumented("search_with_subqueries")
+    def search_with_subqueries(self, subqueries: List[str], merge: bool = False, target_results: Optional[int] = None,
+                               min_score: float = 0.0, max_concurrency: int = 3) -> Union[List[Dict[str, Any]], Dict[str, Any]]:
+        """依次对每个子查询执行联合搜索
+        
+        Args:
+            subqueries: 子查询列表
+            merge: 是否把所有子查询的结果去重合并为一个列表
+            target_results: 目标结果数，指定后按顺序并发执行子查询，去重后分数不低于 min_score 的结果
+                达到目标时跳过剩余子查询，并返回合并结果
+            min_score: 计入目标的最低分数（没有分数的结果只在 min_score 为0时计入）
+            max_concurrency: 提前结束模式下同时进行的子查询数
+            
+        Returns:
+            搜索结果列表，merge=True 或指定 target_results 时为合并结果
+        
+        Raises:
+            ValueError: 指定 target_results 时 target_results 或 max_concurrency 不是正整数
+        """
+        if target_results is not None:
+            return self._search_until_target(subqueries, target_results, min_score, max_concurrency)
+        results = [self.search(query) for query in subqueries]
+        return self.merge_results(results, subqueries) if merge else results
+
+    @instrumented("search_async")
+    async def search_async(self, queries: List[str], max_concurrency: int = 5, merge: bool = False) -> Union[List[Dict[str, Any]], Dict[str, Any]]:
+        """异步联合搜索多个查询
+        
+        Args:
+            queries: 查询列表
+            max_concurrency: 初始并发查询数（之后由自适应限制器调整）
+            merge: 是否把所有查询的结果去重合并为一个列表
+            
+        Returns:
+            搜索结果列表，merge=True 时为 merge_results 的合并结果
+        """
+        results = await self._gather_adaptive(queries, max_concurrency, self.asearch)
+        return self.merge_results(results, queries) if merge else results
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取对冲统计以及各引擎当前的对冲等待时间"""
+        with self._lock:
+            stats = dict(self.stats)
+        stats["hedge_delays"] = {engine.name: self.get_hedge_delay(engine) for engine in self.engines}
+        return stats
+
+    def close(self) -> None:
+        """关闭对冲请求使用的线程池（不等待仍在进行的请求）"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        super().close()
 
 # 可以在此添加其他搜索引擎实现
 # class GoogleSearchEngine(SearchEngine):
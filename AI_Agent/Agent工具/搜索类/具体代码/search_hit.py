@@ -0,0 +1,132 @@
+from __future__ import annotations
+import json
+import zlib
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+try:
+    import orjson
+except ImportError:  # 未安装 orjson 时退回标准库
+    orjson = None
+
+
+def json_loads(data: Union[bytes, str]) -> Any:
+    """解析JSON，安装了 orjson 时使用 orjson（通常快数倍）"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def item_text(item: Dict[str, Any], source: Optional[str] = None) -> Tuple[str, Optional[str]]:
+    """取单条结果的摘要和原文，按条目自身的 engine 字段（没有时按 source）选择字段映射
+
+    Jina 原始结果：description 为摘要，content 为原文；
+    Tavily 结果及 extract_hits 统一后的结果：content 为摘要，raw_content 为原文。
+
+    Args:
+        item: 单条结果字典
+        source: 引擎名称，条目没有 engine 字段时使用
+
+    Returns:
+        (摘要, 原文)，没有原文时原文为None
+    """
+    if (item.get("engine") or source) == "jina" and "description" in item:
+        snippet, raw = item.get("description"), item.get("content")
+    else:
+        snippet, raw = item.get("content"), item.get("raw_content")
+    return snippet or "", raw or None
+
+
+class SearchHit:
+    """统一的搜索结果条目
+
+    原始网页内容（raw_content）体积通常远大于其他字段，
+    以zlib压缩后的字节保存，访问 raw_content 时才解压。
+    使用 __slots__ 减少每条结果的内存占用（不依赖 Python 3.10 的 dataclass(slots=True)）。
+    """
+
+    __slots__ = ("title", "url", "snippet", "score", "source", "_raw")
+
+    def __init__(self, title: str, url: str, snippet: str, score: Optional[float], source: str,
+                 _raw: Optional[bytes] = None):
+        self.title = title
+        self.url = url
+        self.snippet = snippet
+        self.score = score
+        self.source = source
+        self._raw = _raw
+
+    def _fields(self) -> tuple:
+        return (self.title, self.url, self.snippet, self.score, self.source)
+
+    def __eq__(self, other: Any) -> bool:
+        # 与原 dataclass 一致：比较除原文以外的字段
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self._fields() == other._fields()
+
+    __hash__ = None  # 可变对象，与 dataclass(eq=True) 一样不可哈希
+
+    def __repr__(self) -> str:
+        return (f"SearchHit(title={self.title!r}, url={self.url!r}, snippet={self.snippet!r}, "
+                f"score={self.score!r}, source={self.source!r})")
+
+    @property
+    def raw_content(self) -> Optional[str]:
+        """原始网页内容（按需解压）"""
+        if self._raw is None:
+            return None
+        return zlib.decompress(self._raw).decode("utf-8")
+
+    @property
+    def has_raw_content(self) -> bool:
+        return self._raw is not None
+
+    @classmethod
+    def from_item(cls, item: Dict[str, Any], source: str) -> "SearchHit":
+        """从引擎返回的单条结果创建
+
+        字段映射见 item_text（按条目的 engine 字段选择，联合搜索的结果也能正确映射）。
+
+        Args:
+            item: 单条结果字典
+            source: 引擎名称，条目没有 engine 字段时使用
+        """
+        snippet, raw = item_text(item, source)
+        score = item.get("score")
+        return cls(
+            title=item.get("title") or "",
+            url=item.get("url") or "",
+            snippet=snippet or (raw or "")[:300],
+            score=float(score) if isinstance(score, (int, float)) else None,
+            source=item.get("engine") or source,
+            _raw=zlib.compress(raw.encode("utf-8"), 1) if raw else None,
+        )
+
+    def to_dict(self, include_raw: bool = False) -> Dict[str, Any]:
+        """转换为字典（默认不包含原文）"""
+        result = {"title": self.title, "url": self.url, "snippet": self.snippet, "score": self.score, "source": self.source}
+        if include_raw:
+            result["raw_content"] = self.raw_content
+        return result
+
+
+def parse_hits(payload: Union[bytes, str, Dict[str, Any]], source: str) -> List[SearchHit]:
+    """把引擎返回的结果（JSON文本或已解析的字典）转换为 SearchHit 列表
+
+    Tavily 结果位于 "results"，Jina 结果位于 "data"。
+
+    Args:
+        payload: 引擎返回的结果
+        source: 引擎名称
+
+    Returns:
+        SearchHit 列表，错误结果返回空列表
+    """
+    if isinstance(payload, (bytes, str)):
+        payload = json_loads(payload)
+    if not isinstance(payload, dict) or "error" in payload:
+        return []
+    items = payload.get("results")
+    if items is None:
+        items = payload.get("data") or []
+    return [SearchHit.from_item(item, source) for item in items if isinstance(item, dict) and item.get("url")]
@@ -0,0 +1,181 @@
+from __future__ import annotations
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+
+def is_overload(result: Any) -> bool:
+    """判断一次请求的结果是否表示服务端过载（HTTP 429、5xx或超时）
+
+    Args:
+        result: 搜索结果字典或异常对象
+
+    Returns:
+        是否应当降低并发
+    """
+    if isinstance(result, BaseException):
+        status = getattr(getattr(result, "response", None), "status_code", None)
+        error_type = type(result).__name__
+    elif isinstance(result, dict) and "error" in result:
+        status = result.get("status_code")
+        error_type = result.get("error_type", "")
+    else:
+        return False
+    if status is not None:
+        return status == 429 or status >= 500
+    return "Timeout" in error_type or isinstance(result, asyncio.TimeoutError)
+
+
+class AdaptiveConcurrencyLimiter:
+    """基于AIMD（加性增、乘性减）的自适应并发限制器
+
+    - 延迟保持在基线附近时，每完成约 limit 个请求并发上限加 1
+    - 出现 429、5xx 或超时时，并发上限乘以 backoff（一个延迟周期内最多退避一次）
+    - 学习到的上限保存在实例上，同一个引擎的后续批次直接沿用
+    """
+
+    def __init__(self,
+                 initial_limit: float = 5,
+                 min_limit: float = 1,
+                 max_limit: float = 100,
+                 backoff: float = 0.5,
+                 latency_tolerance: float = 2.0,
+                 smoothing: float = 0.2):
+        """初始化限制器
+
+        Args:
+            initial_limit: 初始并发上限
+            min_limit: 最小并发上限
+            max_limit: 最大并发上限
+            backoff: 过载时的乘性退避系数
+            latency_tolerance: 延迟超过基线的倍数后停止增长
+            smoothing: 延迟EWMA的平滑系数
+        """
+        self.limit = float(initial_limit)
+        self.min_limit = float(min_limit)
+        self.max_limit = float(max_limit)
+        self.backoff = backoff
+        self.latency_tolerance = latency_tolerance
+        self.smoothing = smoothing
+        self.baseline_latency: Optional[float] = None
+        self.ewma_latency: Optional[float] = None
+        self._in_flight = 0
+        self._waiters: deque = deque()
+        self._granted: set = set()
+        self._last_backoff = 0.0
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "overloads": 0, "backoffs": 0}
+
+    async def acquire(self) -> None:
+        """获取一个并发名额，超过上限时排队等待"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            # 丢弃已关闭事件循环上遗留的等待者
+            while self._waiters and self._waiters[0].get_loop().is_closed():
+                self._waiters.popleft()
+            if self._in_flight < max(1, int(self.limit)) and not self._waiters:
+                self._in_flight += 1
+                return
+            waiter = loop.create_future()
+            self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            with self._lock:
+                if waiter in self._granted:
+                    # 名额已经转交给当前协程，归还名额
+                    self._granted.discard(waiter)
+                    self._in_flight -= 1
+                    self._wake()
+                elif waiter in self._waiters:
+                    self._waiters.remove(waiter)
+            raise
+        with self._lock:
+            self._granted.discard(waiter)
+
+    def release(self, result: Any, latency: float) -> None:
+        """归还名额并根据结果调整并发上限
+
+        Args:
+            result: 请求结果字典或异常对象
+            latency: 请求耗时（秒）
+        """
+        with self._lock:
+            self._in_flight -= 1
+            self.stats["requests"] += 1
+            if is_overload(result):
+                self.stats["overloads"] += 1
+                now = time.monotonic()
+                # 同一批并发请求同时失败时只退避一次
+                if now - self._last_backoff >= (self.ewma_latency or 0.0):
+                    self.limit = max(self.min_limit, self.limit * self.backoff)
+                    self._last_backoff = now
+                    self.stats["backoffs"] += 1
+            elif not isinstance(result, BaseException) and not (isinstance(result, dict) and "error" in result):
+                self._observe_latency(latency)
+            self._wake()
+
+    def _observe_latency(self, latency: float) -> None:
+        """记录成功请求的延迟，延迟平稳时加性增长"""
+        if self.ewma_latency is None:
+            self.ewma_latency = latency
+        else:
+            self.ewma_latency += self.smoothing * (latency - self.ewma_latency)
+        if self.baseline_latency is None or latency < self.baseline_latency:
+            self.baseline_latency = latency
+        else:
+            # 基线缓慢上浮，避免一次异常快的请求永久压低基线
+            self.baseline_latency *= 1.001
+        if self.ewma_latency <= self.baseline_latency * self.latency_tolerance:
+            self.limit = min(self.max_limit, self.limit + 1.0 / max(self.limit, 1.0))
+
+    def _wake(self) -> None:
+        """在名额允许的情况下唤醒等待者（需持有锁）"""
+        while self._waiters and self._in_flight < max(1, int(self.limit)):
+            waiter = self._waiters.popleft()
+            if waiter.done() or waiter.get_loop().is_closed():
+                continue
+            self._in_flight += 1
+            self._granted.add(waiter)
+            waiter.get_loop().call_soon_threadsafe(self._resolve, waiter)
+
+    @staticmethod
+    def _resolve(waiter: asyncio.Future) -> None:
+        if not waiter.done():
+            waiter.set_result(None)
+
+    async def run(self, afn: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        """在并发限制下执行一次请求并反馈结果
+
+        Args:
+            afn: 返回可等待对象的函数
+
+        Returns:
+            请求结果
+        """
+        await self.acquire()
+        start = time.perf_counter()
+        result: Any = None
+        try:
+            result = await afn()
+            return result
+        except BaseException as e:
+            result = e
+            raise
+        finally:
+            self.release(result, time.perf_counter() - start)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取当前并发上限、延迟和过载统计"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats.update({
+                "limit": self.limit,
+                "in_flight": self._in_flight,
+                "waiting": len(self._waiters),
+                "ewma_latency": self.ewma_latency,
+                "baseline_latency": self.baseline_latency,
+            })
+            return stats
@@ -0,0 +1,318 @@
+from __future__ import annotations
+import asyncio
+import functools
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger("search_metrics")
+
+# 延迟直方图的桶上界（秒）
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Histogram:
+    """固定桶直方图（与Prometheus直方图相同的累积语义）"""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+    def cumulative(self) -> List[Tuple[float, int]]:
+        """返回 [(上界, 累积计数)]，不含 +Inf"""
+        total = 0
+        result = []
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+    def quantile(self, q: float) -> float:
+        """按桶估算分位数（返回所在桶的上界，超出最大桶时返回最大上界）"""
+        if self.count == 0:
+            return 0.0
+        target = q * self.count
+        for bound, total in self.cumulative():
+            if total >= target:
+                return bound
+        return self.buckets[-1]
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels: Any) -> str:
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+class SearchMetrics:
+    """搜索引擎指标：按 引擎 + 方法 统计请求数、错误类型、缓存命中和延迟直方图，按主机统计接收字节数"""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        """初始化指标集合
+
+        Args:
+            buckets: 延迟直方图的桶上界（秒）
+        """
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self.requests: Dict[Tuple[str, str, str], int] = {}
+        self.errors: Dict[Tuple[str, str, str], int] = {}
+        self.cache_hits: Dict[Tuple[str, str], int] = {}
+        self.bytes_received: Dict[str, int] = {}
+        self.latency: Dict[Tuple[str, str], Histogram] = {}
+
+    def observe(self, engine: str, method: str, elapsed: float, error_type: Optional[str] = None) -> None:
+        """记录一次方法调用
+
+        Args:
+            engine: 引擎名称
+            method: 方法名称
+            elapsed: 耗时（秒）
+            error_type: 失败时的错误类型，成功时为None
+        """
+        outcome = "error" if error_type else "ok"
+        with self._lock:
+            key = (engine, method, outcome)
+            self.requests[key] = self.requests.get(key, 0) + 1
+            if error_type:
+                error_key = (engine, method, error_type)
+                self.errors[error_key] = self.errors.get(error_key, 0) + 1
+            histogram = self.latency.get((engine, method))
+            if histogram is None:
+                histogram = self.latency[(engine, method)] = Histogram(self.buckets)
+            histogram.observe(elapsed)
+
+    def record_cache_hit(self, engine: str, method: str) -> None:
+        with self._lock:
+            key = (engine, method)
+            self.cache_hits[key] = self.cache_hits.get(key, 0) + 1
+
+    def record_bytes(self, host: str, size: int) -> None:
+        with self._lock:
+            self.bytes_received[host] = self.bytes_received.get(host, 0) + size
+
+    def snapshot(self) -> Dict[str, Any]:
+        """获取按 引擎.方法 汇总的指标（便于日志输出）"""
+        with self._lock:
+            methods: Dict[str, Dict[str, Any]] = {}
+            for (engine, method), histogram in self.latency.items():
+                methods[f"{engine}.{method}"] = {
+                    "count": histogram.count,
+                    "errors": self.requests.get((engine, method, "error"), 0),
+                    "cache_hits": self.cache_hits.get((engine, method), 0),
+                    "avg_ms": histogram.sum / histogram.count * 1000 if histogram.count else 0.0,
+                    "p50_ms": histogram.quantile(0.5) * 1000,
+                    "p95_ms": histogram.quantile(0.95) * 1000,
+                    "p99_ms": histogram.quantile(0.99) * 1000,
+                }
+            return {"methods": methods, "bytes_received": dict(self.bytes_received)}
+
+    def render_prometheus(self) -> str:
+        """以Prometheus文本格式输出所有指标"""
+        lines = []
+        with self._lock:
+            lines.append("# HELP search_requests_total 搜索方法调用次数")
+            lines.append("# TYPE search_requests_total counter")
+            for (engine, method, outcome), value in sorted(self.requests.items()):
+                lines.append(f"search_requests_total{_labels(engine=engine, method=method, outcome=outcome)} {value}")
+            lines.append("# HELP search_errors_total 按错误类型统计的失败次数")
+            lines.append("# TYPE search_errors_total counter")
+            for (engine, method, error_type), value in sorted(self.errors.items()):
+                lines.append(f"search_errors_total{_labels(engine=engine, method=method, error_type=error_type)} {value}")
+            lines.append("# HELP search_cache_hits_total 结果缓存命中次数")
+            lines.append("# TYPE search_cache_hits_total counter")
+            for (engine, method), value in sorted(self.cache_hits.items()):
+                lines.append(f"search_cache_hits_total{_labels(engine=engine, method=method)} {value}")
+            lines.append("# HELP search_bytes_received_total 从搜索服务接收的字节数")
+            lines.append("# TYPE search_bytes_received_total counter")
+            for host, value in sorted(self.bytes_received.items()):
+                lines.append(f"search_bytes_received_total{_labels(host=host)} {value}")
+            lines.append("# HELP search_request_duration_seconds 搜索方法耗时")
+            lines.append("# TYPE search_request_duration_seconds histogram")
+            for (engine, method), histogram in sorted(self.latency.items()):
+                for bound, total in histogram.cumulative():
+                    labels = _labels(engine=engine, method=method, le=f"{bound:g}")
+                    lines.append(f"search_request_duration_seconds_bucket{labels} {total}")
+                labels = _labels(engine=engine, method=method, le="+Inf")
+                lines.append(f"search_request_duration_seconds_bucket{labels} {histogram.count}")
+                labels = _labels(engine=engine, method=method)
+                lines.append(f"search_request_duration_seconds_sum{labels} {histogram.sum}")
+                lines.append(f"search_request_duration_seconds_count{labels} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+def _error_type_of(result: Any) -> Optional[str]:
+    """从返回值中识别失败（带 error 字段的结果字典）"""
+    if isinstance(result, dict) and "error" in result:
+        return result.get("error_type") or "Error"
+    return None
+
+
+def instrumented(method: str) -> Callable:
+    """方法装饰器：把调用耗时和结果记录到 self.metrics（未配置时不做任何事）
+
+    同时支持同步方法和异步方法，引擎名取自 self.name。
+
+    Args:
+        method: 指标中的方法名称
+    """
+    def decorator(fn: Callable) -> Callable:
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(self, *args, **kwargs):
+                metrics = getattr(self, "metrics", None)
+                if metrics is None:
+                    return await fn(self, *args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    result = await fn(self, *args, **kwargs)
+                except BaseException as e:
+                    metrics.observe(self.name, method, time.perf_counter() - start, type(e).__name__)
+                    raise
+                metrics.observe(self.name, method, time.perf_counter() - start, _error_type_of(result))
+                return result
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(self, *args, **kwargs):
+            metrics = getattr(self, "metrics", None)
+            if metrics is None:
+                return fn(self, *args, **kwargs)
+            start = time.perf_counter()
+            try:
+                result = fn(self, *args, **kwargs)
+            except BaseException as e:
+                metrics.observe(self.name, method, time.perf_counter() - start, type(e).__name__)
+                raise
+            metrics.observe(self.name, method, time.perf_counter() - start, _error_type_of(result))
+            return result
+        return wrapper
+    return decorator
+
+
+class MetricsExporter(ABC):
+    """指标导出器接口"""
+
+    def __init__(self, metrics: SearchMetrics):
+        self.metrics = metrics
+
+    @abstractmethod
+    def start(self) -> "MetricsExporter":
+        """开始导出"""
+        pass
+
+    @abstractmethod
+    def stop(self) -> None:
+        """停止导出"""
+        pass
+
+
+class PrometheusExporter(MetricsExporter):
+    """在后台线程中提供 /metrics 接口，供Prometheus抓取"""
+
+    def __init__(self, metrics: SearchMetrics, port: int = 9108, host: str = "127.0.0.1"):
+        """初始化Prometheus导出器
+
+        Args:
+            metrics: 指标集合
+            port: 监听端口，0 表示自动分配
+            host: 监听地址，默认只监听本机，需要供其他主机抓取时传入 "0.0.0.0"
+        """
+        super().__init__(metrics)
+        self.host = host
+        self.port = port
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    def start(self) -> "PrometheusExporter":
+        metrics = self.metrics
+
+        class _Handler(BaseHTTPRequestHandler):
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+            def do_GET(self) -> None:
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.render_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self._server = ThreadingHTTPServer((self.host, self.port), _Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        logger.info(f"Prometheus指标接口已启动: http://{self.host}:{self.port}/metrics")
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+class LogExporter(MetricsExporter):
+    """定期把指标摘要写入日志"""
+
+    def __init__(self, metrics: SearchMetrics, interval: float = 60.0, log: Optional[logging.Logger] = None):
+        """初始化日志导出器
+
+        Args:
+            metrics: 指标集合
+            interval: 输出间隔（秒）
+            log: 使用的日志记录器，默认为 search_metrics
+        """
+        super().__init__(metrics)
+        self.interval = interval
+        self.log = log or logger
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def dump(self) -> None:
+        """立即输出一次指标摘要"""
+        snapshot = self.metrics.snapshot()
+        for name, stats in sorted(snapshot["methods"].items()):
+            self.log.info(
+                f"{name}: 请求 {stats['count']} 次, 失败 {stats['errors']} 次, 缓存命中 {stats['cache_hits']} 次, "
+                f"平均 {stats['avg_ms']:.0f}ms, p95 <= {stats['p95_ms']:.0f}ms"
+            )
+        for host, size in sorted(snapshot["bytes_received"].items()):
+            self.log.info(f"{host}: 已接收 {size} 字节")
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.dump()
+            except Exception as e:
+                self.log.error(f"输出搜索指标出错: {e}")
+
+    def start(self) -> "LogExporter":
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
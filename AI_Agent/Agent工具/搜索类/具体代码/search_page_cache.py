@@ -0,0 +1,128 @@
+from __future__ import annotations
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Dict, Optional
+
+
+class PageCache:
+    """网页内容缓存（SQLite持久化，正文zlib压缩）
+
+    除正文外还保存源站返回的 ETag / Last-Modified，
+    过期后先向源站发送条件请求，返回304时直接复用本地内容。
+    """
+
+    def __init__(self, path: str, fresh_ttl: float = 3600, max_entries: int = 50000, compress_level: int = 6):
+        """初始化网页缓存
+
+        Args:
+            path: SQLite数据库文件路径
+            fresh_ttl: 缓存被视为新鲜、无需重新验证的时间（秒）
+            max_entries: 最大缓存条目数，超出后按最近访问时间淘汰
+            compress_level: zlib压缩级别（1-9）
+        """
+        self.fresh_ttl = fresh_ttl
+        self.max_entries = max_entries
+        self.compress_level = compress_level
+        self._lock = threading.Lock()
+        self.stats = {"fresh_hits": 0, "revalidated": 0, "refetched": 0, "misses": 0,
+                      "raw_bytes": 0, "stored_bytes": 0}
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS page_cache (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                body BLOB NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_page_cache_accessed ON page_cache(accessed_at)")
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(url: str, options: str = "Default") -> str:
+        return hashlib.sha256(f"{options}\n{url}".encode("utf-8")).hexdigest()
+
+    def get(self, url: str, options: str = "Default") -> Optional[Dict[str, Any]]:
+        """读取缓存条目
+
+        Returns:
+            {"body", "etag", "last_modified", "fetched_at", "fresh"}，不存在时返回None
+        """
+        key = self.make_key(url, options)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body, etag, last_modified, fetched_at FROM page_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE page_cache SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+        body, etag, last_modified, fetched_at = row
+        return {
+            "body": json.loads(zlib.decompress(body).decode("utf-8")),
+            "etag": etag,
+            "last_modified": last_modified,
+            "fetched_at": fetched_at,
+            "fresh": time.time() - fetched_at < self.fresh_ttl,
+        }
+
+    def put(self, url: str, body: Dict[str, Any], options: str = "Default",
+            etag: Optional[str] = None, last_modified: Optional[str] = None) -> None:
+        """写入缓存条目（正文压缩存储）"""
+        raw = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        compressed = zlib.compress(raw, self.compress_level)
+        now = time.time()
+        with self._lock:
+            self.stats["raw_bytes"] += len(raw)
+            self.stats["stored_bytes"] += len(compressed)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO page_cache (key, url, body, etag, last_modified, fetched_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (self.make_key(url, options), url, compressed, etag, last_modified, now, now),
+            )
+            count = self._conn.execute("SELECT COUNT(*) FROM page_cache").fetchone()[0]
+            if count > self.max_entries:
+                self._conn.execute(
+                    "DELETE FROM page_cache WHERE key IN "
+                    "(SELECT key FROM page_cache ORDER BY accessed_at ASC LIMIT ?)",
+                    (count - self.max_entries,),
+                )
+            self._conn.commit()
+
+    def touch(self, url: str, options: str = "Default") -> None:
+        """源站返回304时刷新抓取时间"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE page_cache SET fetched_at = ?, accessed_at = ? WHERE key = ?",
+                (now, now, self.make_key(url, options)),
+            )
+            self._conn.commit()
+
+    def record(self, outcome: str) -> None:
+        """记录一次读取的结果：fresh_hits / revalidated / refetched / misses"""
+        with self._lock:
+            self.stats[outcome] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取命中、重新验证和压缩率统计"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats["entries"] = self._conn.execute("SELECT COUNT(*) FROM page_cache").fetchone()[0]
+        stats["compression_ratio"] = stats["stored_bytes"] / stats["raw_bytes"] if stats["raw_bytes"] else 0.0
+        return stats
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,243 @@
+from __future__ import annotations
+import asyncio
+import atexit
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+
+class RateLimitExceeded(Exception):
+    """请求频率超过限制"""
+
+    def __init__(self, message: str, retry_after: float = 0.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class QuotaExceeded(RateLimitExceeded):
+    """本月调用额度已用完"""
+
+
+class TokenBucket:
+    """令牌桶：以固定速率补充令牌，容量决定允许的突发请求数"""
+
+    def __init__(self, rate: float, capacity: float):
+        """初始化令牌桶
+
+        Args:
+            rate: 每秒补充的令牌数
+            capacity: 令牌桶容量
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def wait_time(self) -> float:
+        """获取一个令牌需要等待的时间（秒），0表示可以立即获取"""
+        self._refill()
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def consume(self) -> None:
+        """消耗一个令牌（调用前需确认 wait_time() 为0）"""
+        self.tokens -= 1
+
+
+class SearchRateLimiter:
+    """单个搜索引擎的限流器：每秒/每分钟请求数 + 持久化的月度额度
+
+    search、search_with_subqueries、search_async 共用同一个限流器。
+    触发限制时按 on_limit 中的顺序依次尝试：
+    - "cache": 返回已过期的缓存结果
+    - "fallback": 改用引擎的 fallback_engine
+    - "queue": 排队等待令牌（最多 max_wait 秒，月度额度耗尽时不排队）
+
+    月度用量批量持久化：每 save_every 次请求或每 save_interval 秒写一次文件，close 和进程退出时再写一次；
+    写文件在限流器的锁之外进行，异步调用时在线程池中进行。
+    """
+
+    def __init__(self,
+                 requests_per_second: Optional[float] = None,
+                 requests_per_minute: Optional[float] = None,
+                 monthly_budget: Optional[int] = None,
+                 budget_path: Optional[str] = None,
+                 on_limit: Sequence[str] = ("cache", "fallback", "queue"),
+                 max_wait: float = 30.0,
+                 save_every: int = 20,
+                 save_interval: float = 5.0):
+        """初始化限流器
+
+        Args:
+            requests_per_second: 每秒最大请求数
+            requests_per_minute: 每分钟最大请求数
+            monthly_budget: 每月最大请求数
+            budget_path: 月度用量的持久化文件路径（JSON），为None时只在内存中计数
+            on_limit: 触发限制时的处理顺序
+            max_wait: 排队等待的最长时间（秒）
+            save_every: 累计多少次请求后写一次额度文件
+            save_interval: 距上次写额度文件超过多少秒后再写一次
+        """
+        self.buckets: List[TokenBucket] = []
+        if requests_per_second:
+            self.buckets.append(TokenBucket(requests_per_second, max(1.0, requests_per_second)))
+        if requests_per_minute:
+            self.buckets.append(TokenBucket(requests_per_minute / 60.0, max(1.0, requests_per_minute)))
+        self.monthly_budget = monthly_budget
+        self.budget_path = budget_path
+        self.on_limit = tuple(on_limit)
+        self.max_wait = max_wait
+        self.save_every = save_every
+        self.save_interval = save_interval
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()  # 串行化文件写入，不阻塞获取许可
+        self._month = self._current_month()
+        self._used = 0
+        self._unsaved = 0
+        self._saved_at = time.monotonic()
+        self.stats = {"admitted": 0, "throttled": 0, "quota_rejected": 0, "queued_seconds": 0.0}
+        self._load_budget()
+        if budget_path:
+            atexit.register(self.close)
+
+    @staticmethod
+    def _current_month() -> str:
+        return datetime.now().strftime("%Y-%m")
+
+    def _load_budget(self) -> None:
+        """从文件加载本月已用额度"""
+        if not self.budget_path or not os.path.exists(self.budget_path):
+            return
+        try:
+            with open(self.budget_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("month") == self._month:
+                self._used = int(data.get("used", 0))
+        except (OSError, ValueError) as e:
+            print(f"读取额度文件出错: {e}")
+
+    def _save_due(self) -> bool:
+        """是否需要写额度文件（需持有锁）"""
+        if not self.budget_path or not self._unsaved:
+            return False
+        return self._unsaved >= self.save_every or time.monotonic() - self._saved_at >= self.save_interval
+
+    def flush(self) -> None:
+        """持久化本月已用额度（先写临时文件再替换，避免写坏）"""
+        if not self.budget_path:
+            return
+        with self._save_lock:
+            with self._lock:
+                if not self._unsaved:
+                    return
+                data = {"month": self._month, "used": self._used}
+                unsaved, self._unsaved = self._unsaved, 0
+                self._saved_at = time.monotonic()
+            try:
+                directory = os.path.dirname(os.path.abspath(self.budget_path))
+                os.makedirs(directory, exist_ok=True)
+                tmp_path = f"{self.budget_path}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(data, f)
+                os.replace(tmp_path, self.budget_path)
+            except OSError as e:
+                print(f"写入额度文件出错: {e}")
+                with self._lock:
+                    self._unsaved += unsaved
+
+    def close(self) -> None:
+        """写入尚未持久化的额度"""
+        self.flush()
+
+    def _try_acquire(self) -> float:
+        """尝试获取许可（需持有锁），成功返回0，否则返回需要等待的时间
+
+        Raises:
+            QuotaExceeded: 本月额度已用完
+        """
+        month = self._current_month()
+        if month != self._month:
+            self._month, self._used = month, 0
+        if self.monthly_budget is not None and self._used >= self.monthly_budget:
+            self.stats["quota_rejected"] += 1
+            raise QuotaExceeded(f"本月额度已用完: {self._used}/{self.monthly_budget}")
+        wait = max((bucket.wait_time() for bucket in self.buckets), default=0.0)
+        if wait > 0:
+            return wait
+        for bucket in self.buckets:
+            bucket.consume()
+        self._used += 1
+        self._unsaved += 1
+        self.stats["admitted"] += 1
+        return 0.0
+
+    def acquire(self, blocking: bool = True) -> None:
+        """获取一次请求许可
+
+        Args:
+            blocking: 是否排队等待令牌
+
+        Raises:
+            QuotaExceeded: 本月额度已用完
+            RateLimitExceeded: 不排队或等待超过 max_wait 时
+        """
+        deadline = time.monotonic() + self.max_wait
+        while True:
+            with self._lock:
+                wait = self._try_acquire()
+                save = wait <= 0 and self._save_due()
+                if wait > 0 and (not blocking or time.monotonic() + wait > deadline):
+                    self.stats["throttled"] += 1
+                    raise RateLimitExceeded(f"请求过于频繁，需等待 {wait:.2f} 秒", retry_after=wait)
+                if wait > 0:
+                    self.stats["queued_seconds"] += wait
+            if wait <= 0:
+                if save:
+                    self.flush()
+                return
+            time.sleep(wait)
+
+    async def aacquire(self, blocking: bool = True) -> None:
+        """acquire 的异步版本，等待时不阻塞事件循环"""
+        deadline = time.monotonic() + self.max_wait
+        while True:
+            with self._lock:
+                wait = self._try_acquire()
+                save = wait <= 0 and self._save_due()
+                if wait > 0 and (not blocking or time.monotonic() + wait > deadline):
+                    self.stats["throttled"] += 1
+                    raise RateLimitExceeded(f"请求过于频繁，需等待 {wait:.2f} 秒", retry_after=wait)
+                if wait > 0:
+                    self.stats["queued_seconds"] += wait
+            if wait <= 0:
+                if save:
+                    # 在线程池中写文件，不阻塞事件循环
+                    await asyncio.to_thread(self.flush)
+                return
+            await asyncio.sleep(wait)
+
+    def remaining_budget(self) -> Optional[int]:
+        """本月剩余额度，未设置月度额度时返回None"""
+        if self.monthly_budget is None:
+            return None
+        with self._lock:
+            if self._current_month() != self._month:
+                return self.monthly_budget
+            return max(0, self.monthly_budget - self._used)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取限流统计和额度使用情况"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats.update({"month": self._month, "used": self._used, "monthly_budget": self.monthly_budget})
+        stats["remaining_budget"] = self.remaining_budget()
+        return stats
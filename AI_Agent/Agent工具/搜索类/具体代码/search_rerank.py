@@ -0,0 +1,102 @@
+from __future__ import annotations
+import math
+import re
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+# 拉丁字母/数字按词切分，中日韩文字按单字和相邻双字切分
+_WORD_RE = re.compile(r"[0-9a-z]+|[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af]+")
+_CJK_RE = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af]")
+
+
+def tokenize(text: str) -> List[str]:
+    """简单的多语言分词：英文按词，中文按单字+双字"""
+    tokens = []
+    for word in _WORD_RE.findall(str(text).lower()):
+        if _CJK_RE.match(word):
+            tokens.extend(word)
+            tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+        else:
+            tokens.append(word)
+    return tokens
+
+
+class LocalReranker:
+    """本地BM25重排序器（NumPy向量化）
+
+    在重排序API不可用、被限流或过慢时使用，返回与 Jina rerank 相同的结构：
+    {"model": ..., "results": [{"index", "relevance_score", "document": {"text"}}]}
+    """
+
+    model = "local-bm25"
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        """初始化本地重排序器
+
+        Args:
+            k1: BM25词频饱和参数
+            b: BM25文档长度归一化参数
+        """
+        self.k1 = k1
+        self.b = b
+
+    def score(self, query: str, documents: List[str]) -> List[float]:
+        """计算每个文档相对查询的BM25分数
+
+        Args:
+            query: 查询字符串
+            documents: 文档列表
+
+        Returns:
+            分数列表，与 documents 一一对应
+        """
+        import numpy as np
+
+        query_terms = list(dict.fromkeys(tokenize(query)))
+        if not documents or not query_terms:
+            return [0.0] * len(documents)
+
+        term_index = {term: i for i, term in enumerate(query_terms)}
+        tf = np.zeros((len(documents), len(query_terms)), dtype=np.float32)
+        lengths = np.zeros(len(documents), dtype=np.float32)
+        for row, document in enumerate(documents):
+            tokens = tokenize(document)
+            lengths[row] = len(tokens)
+            for term, count in Counter(tokens).items():
+                col = term_index.get(term)
+                if col is not None:
+                    tf[row, col] = count
+
+        n_docs = len(documents)
+        df = (tf > 0).sum(axis=0)
+        idf = np.log1p((n_docs - df + 0.5) / (df + 0.5))
+        avg_length = max(float(lengths.mean()), 1.0)
+        norm = self.k1 * (1 - self.b + self.b * lengths / avg_length)
+        scores = (idf * tf * (self.k1 + 1) / (tf + norm[:, None])).sum(axis=1)
+        return scores.tolist()
+
+    def rerank(self, query: str, documents: List[str], top_n: Optional[int] = None) -> Dict[str, Any]:
+        """对文档重排序
+
+        Args:
+            query: 查询字符串
+            documents: 文档列表
+            top_n: 返回的结果数量
+
+        Returns:
+            与 Jina rerank 相同结构的结果，relevance_score 归一化到 0-1
+        """
+        scores = self.score(query, documents)
+        best = max(scores, default=0.0)
+        order = sorted(range(len(documents)), key=lambda i: scores[i], reverse=True)
+        if top_n:
+            order = order[:top_n]
+        results = [
+            {
+                "index": i,
+                "relevance_score": scores[i] / best if best > 0 and not math.isnan(best) else 0.0,
+                "document": {"text": documents[i]},
+            }
+            for i in order
+        ]
+        return {"model": self.model, "results": results}
@@ -0,0 +1,279 @@
+from __future__ import annotations
+import asyncio
+import random
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from .search_ratelimit import RateLimitExceeded
+
+# 可重试的HTTP状态码：限流和服务端临时故障
+RETRYABLE_STATUS = {408, 425, 429, 500, 502, 503, 504}
+# 按异常类型名判断的网络类错误（requests / httpx / 内置异常）
+_RETRYABLE_NAMES = ("Timeout", "ConnectionError", "ConnectError", "RemoteProtocolError", "ReadError", "WriteError",
+                    "ChunkedEncodingError", "ProtocolError")
+
+
+class CircuitOpenError(Exception):
+    """熔断器处于打开状态，请求被快速拒绝"""
+
+    def __init__(self, message: str, retry_after: float = 0.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def _status_of(error: BaseException) -> Optional[int]:
+    return getattr(getattr(error, "response", None), "status_code", None)
+
+
+def is_retryable(error: BaseException) -> bool:
+    """判断异常是否值得重试（也即是否说明服务端暂时不健康）
+
+    - 429、408和5xx网关类错误、超时、连接错误：可重试
+    - 其余4xx（如密钥无效、参数错误）、本地限流、熔断拒绝：不重试
+
+    Args:
+        error: 请求抛出的异常
+
+    Returns:
+        是否可重试
+    """
+    if isinstance(error, (CircuitOpenError, RateLimitExceeded)):
+        return False
+    status = _status_of(error)
+    if status is not None:
+        return status in RETRYABLE_STATUS
+    if isinstance(error, (TimeoutError, ConnectionError, asyncio.TimeoutError)):
+        return True
+    name = type(error).__name__
+    return any(marker in name for marker in _RETRYABLE_NAMES)
+
+
+def retry_after_of(error: BaseException) -> Optional[float]:
+    """读取响应头中的 Retry-After（秒），没有或无法解析时返回None"""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        return float(headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+
+class CircuitBreaker:
+    """熔断器：closed → open → half_open → closed
+
+    - closed: 正常放行，连续 failure_threshold 次可重试类失败后打开
+    - open: 直接拒绝请求，recovery_timeout 秒后进入半开状态
+    - half_open: 只放行 half_open_max_calls 个探测请求，成功则关闭，失败则重新打开
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str = "", failure_threshold: int = 5, recovery_timeout: float = 30.0, half_open_max_calls: int = 1):
+        """初始化熔断器
+
+        Args:
+            name: 名称，用于日志输出
+            failure_threshold: 触发熔断的连续失败次数
+            recovery_timeout: 打开后等待多久进入半开状态（秒）
+            half_open_max_calls: 半开状态下同时放行的探测请求数
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+        self.stats = {"successes": 0, "failures": 0, "rejected": 0, "opened": 0}
+
+    def _transition(self, state: str) -> None:
+        """切换状态（需持有锁）"""
+        if state == self._state:
+            return
+        print(f"熔断器 {self.name} 状态变化: {self._state} -> {state}")
+        self._state = state
+        if state == self.OPEN:
+            self._opened_at = time.monotonic()
+            self.stats["opened"] += 1
+        self._probes = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.recovery_timeout:
+                self._transition(self.HALF_OPEN)
+            return self._state
+
+    def before_call(self) -> None:
+        """请求前检查是否放行
+
+        Raises:
+            CircuitOpenError: 熔断器打开或半开状态下探测名额已满
+        """
+        with self._lock:
+            if self._state == self.OPEN:
+                remaining = self.recovery_timeout - (time.monotonic() - self._opened_at)
+                if remaining > 0:
+                    self.stats["rejected"] += 1
+                    raise CircuitOpenError(f"{self.name} 熔断中，{remaining:.1f} 秒后重新探测", retry_after=remaining)
+                self._transition(self.HALF_OPEN)
+            if self._state == self.HALF_OPEN:
+                if self._probes >= self.half_open_max_calls:
+                    self.stats["rejected"] += 1
+                    raise CircuitOpenError(f"{self.name} 正在探测恢复，请求被拒绝")
+                self._probes += 1
+
+    def release(self) -> None:
+        """请求被取消时归还半开探测名额"""
+        with self._lock:
+            if self._state == self.HALF_OPEN and self._probes > 0:
+                self._probes -= 1
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.stats["successes"] += 1
+            self._failures = 0
+            self._transition(self.CLOSED)
+
+    def record_failure(self, error: BaseException) -> None:
+        """记录一次失败，只有可重试类错误（服务端不健康）才计入熔断"""
+        with self._lock:
+            if not is_retryable(error):
+                # 客户端错误说明服务是可达的，释放半开探测名额
+                if self._state == self.HALF_OPEN:
+                    self._transition(self.CLOSED)
+                return
+            self.stats["failures"] += 1
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._transition(self.OPEN)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取熔断器状态和计数"""
+        state = self.state
+        with self._lock:
+            stats = dict(self.stats)
+            stats.update({"state": state, "consecutive_failures": self._failures})
+            if state == self.OPEN:
+                stats["retry_after"] = max(0.0, self.recovery_timeout - (time.monotonic() - self._opened_at))
+        return stats
+
+
+class ResiliencePolicy:
+    """重试 + 熔断策略，由SearchEngineFactory为每个引擎实例注入
+
+    重试使用带上限的指数退避和完全抖动（full jitter）：
+    第 n 次重试前等待 uniform(0, min(max_delay, base_delay * 2**n)) 秒，
+    服务端返回 Retry-After 时至少等待该时间（仍不超过 max_delay）。
+    """
+
+    def __init__(self, name: str = "", max_attempts: int = 3, base_delay: float = 0.2, max_delay: float = 5.0,
+                 breaker: Optional[CircuitBreaker] = None):
+        """初始化策略
+
+        Args:
+            name: 引擎名称
+            max_attempts: 最大尝试次数（含第一次）
+            base_delay: 退避基准时间（秒）
+            max_delay: 单次退避的最长时间（秒）
+            breaker: 熔断器，为None时创建默认熔断器
+        """
+        self.name = name
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.breaker = breaker or CircuitBreaker(name=name)
+        self._lock = threading.Lock()
+        self.stats = {"calls": 0, "retries": 0, "failed": 0}
+
+    def backoff(self, attempt: int, error: BaseException) -> float:
+        """第 attempt 次失败后的等待时间（秒）"""
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        retry_after = retry_after_of(error)
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_delay))
+        return delay
+
+    def _should_retry(self, attempt: int, error: BaseException) -> bool:
+        self.breaker.record_failure(error)
+        if attempt + 1 >= self.max_attempts or not is_retryable(error):
+            with self._lock:
+                self.stats["failed"] += 1
+            return False
+        with self._lock:
+            self.stats["retries"] += 1
+        return True
+
+    def call(self, fn: Callable[[], Any], admit: Optional[Callable[[], None]] = None) -> Any:
+        """在重试和熔断保护下执行fn
+
+        Args:
+            fn: 实际发起请求的函数
+            admit: 每次尝试前（熔断器放行之后）调用的准入函数，如向限流器申请许可，
+                抛出异常时不发起请求并归还熔断器的探测名额
+
+        Raises:
+            CircuitOpenError: 熔断器打开时
+            Exception: 不可重试的错误或重试耗尽后的最后一个错误
+        """
+        with self._lock:
+            self.stats["calls"] += 1
+        attempt = 0
+        while True:
+            self.breaker.before_call()
+            if admit is not None:
+                try:
+                    admit()
+                except BaseException:
+                    self.breaker.release()
+                    raise
+            try:
+                result = fn()
+            except Exception as e:
+                if not self._should_retry(attempt, e):
+                    raise
+                time.sleep(self.backoff(attempt, e))
+                attempt += 1
+                continue
+            self.breaker.record_success()
+            return result
+
+    async def acall(self, afn: Callable[[], Awaitable[Any]], aadmit: Optional[Callable[[], Awaitable[None]]] = None) -> Any:
+        """call 的异步版本，退避时不阻塞事件循环，aadmit 为异步的准入函数"""
+        with self._lock:
+            self.stats["calls"] += 1
+        attempt = 0
+        while True:
+            self.breaker.before_call()
+            if aadmit is not None:
+                try:
+                    await aadmit()
+                except BaseException:
+                    self.breaker.release()
+                    raise
+            try:
+                result = await afn()
+            except asyncio.CancelledError:
+                self.breaker.release()
+                raise
+            except Exception as e:
+                if not self._should_retry(attempt, e):
+                    raise
+                await asyncio.sleep(self.backoff(attempt, e))
+                attempt += 1
+                continue
+            self.breaker.record_success()
+            return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取重试计数和熔断器状态"""
+        with self._lock:
+            stats = dict(self.stats)
+        stats["breaker"] = self.breaker.get_stats()
+        return stats
@@ -0,0 +1,257 @@
+from __future__ import annotations
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from .search_cache import normalize_query
+from .search_hit import json_loads
+
+
+class _ScopeIndex:
+    """单个作用域（引擎 + 方法 + 选项）内的向量索引"""
+
+    def __init__(self):
+        self.ids: List[int] = []
+        self.queries: List[str] = []
+        self.created_at: List[float] = []
+        self.vectors: List[Any] = []
+        self.matrix = None  # 懒构建的 (N, d) 矩阵，向量已归一化
+        self.created = None  # 与 matrix 同时构建的写入时间数组
+
+    def add(self, row_id: int, query: str, vector: Any, created_at: float) -> None:
+        self.ids.append(row_id)
+        self.queries.append(query)
+        self.vectors.append(vector)
+        self.created_at.append(created_at)
+        self.matrix = None
+        self.created = None
+
+    def remove(self, positions: List[int]) -> None:
+        for position in sorted(positions, reverse=True):
+            for values in (self.ids, self.queries, self.vectors, self.created_at):
+                del values[position]
+        self.matrix = None
+        self.created = None
+
+
+class SemanticCache:
+    """语义查询缓存：查询改写后（如"X 研究资料"与"X 详细分析与评价"）也能复用已有结果
+
+    - 查询向量归一化后保存在内存矩阵中，查找时一次矩阵乘法得到所有余弦相似度
+    - 相似度不低于 threshold 时返回缓存结果
+    - 查询向量和结果持久化到SQLite，重启后无需重新计算向量
+    - 条目记录生成向量的模型，更换模型后旧条目在加载时删除；维度不同的向量不参与比较
+    """
+
+    def __init__(self,
+                 embeddings: Any,
+                 path: Optional[str] = None,
+                 threshold: float = 0.92,
+                 ttl: float = 24 * 3600,
+                 max_entries: int = 5000,
+                 model: Optional[str] = None):
+        """初始化语义缓存
+
+        Args:
+            embeddings: 向量模型，提供 embed_query(text) 方法的对象（如 EmbeddingFactory 创建的实例），
+                或 文本 -> 向量 的函数
+            path: SQLite数据库文件路径，为None时只保存在内存中
+            threshold: 命中所需的最低余弦相似度
+            ttl: 缓存结果的有效期（秒）
+            max_entries: 最大条目数，超出后淘汰最早写入的条目
+            model: 向量模型名称，为None时取 embeddings 的 model / model_name 属性
+        """
+        self.embeddings = embeddings
+        if model is None:
+            model = getattr(embeddings, "model", None) or getattr(embeddings, "model_name", None)
+        self.model = str(model or "")
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._scopes: Dict[str, _ScopeIndex] = {}
+        self._values: Dict[int, Dict[str, Any]] = {}
+        self._next_id = 1
+        self.stats = {"hits": 0, "misses": 0, "embedding_errors": 0, "sets": 0}
+
+        self._conn = None
+        if path:
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS semantic_cache (
+                    id INTEGER PRIMARY KEY,
+                    scope TEXT NOT NULL,
+                    query TEXT NOT NULL,
+                    embedding BLOB NOT NULL,
+                    value TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    model TEXT NOT NULL DEFAULT ''
+                )"""
+            )
+            columns = [row[1] for row in self._conn.execute("PRAGMA table_info(semantic_cache)")]
+            if "model" not in columns:
+                # 旧版本数据库没有 model 列
+                self._conn.execute("ALTER TABLE semantic_cache ADD COLUMN model TEXT NOT NULL DEFAULT ''")
+            self._conn.commit()
+            self._load()
+
+    def _load(self) -> None:
+        """从数据库加载未过期且由当前向量模型生成的条目"""
+        import numpy as np
+
+        cutoff = time.time() - self.ttl
+        self._conn.execute("DELETE FROM semantic_cache WHERE created_at <= ? OR model != ?", (cutoff, self.model))
+        self._conn.commit()
+        rows = self._conn.execute(
+            "SELECT id, scope, query, embedding, value, created_at FROM semantic_cache ORDER BY id"
+        ).fetchall()
+        for row_id, scope, query, embedding, value, created_at in rows:
+            vector = np.frombuffer(embedding, dtype=np.float32)
+            self._scopes.setdefault(scope, _ScopeIndex()).add(row_id, query, vector, created_at)
+            self._values[row_id] = json_loads(value)
+            self._next_id = max(self._next_id, row_id + 1)
+
+    def embed(self, query: str) -> Optional[Any]:
+        """计算查询的归一化向量，失败时返回None"""
+        import numpy as np
+
+        try:
+            embed_query = getattr(self.embeddings, "embed_query", self.embeddings)
+            vector = np.asarray(embed_query(normalize_query(query)), dtype=np.float32)
+        except Exception as e:
+            print(f"计算查询向量出错: {e}")
+            with self._lock:
+                self.stats["embedding_errors"] += 1
+            return None
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm > 0 else None
+
+    async def aembed(self, query: str) -> Optional[Any]:
+        """embed 的异步版本，在线程池中计算向量"""
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.embed, query)
+
+    def lookup(self, scope: str, query: str, vector: Any) -> Optional[Tuple[Dict[str, Any], str, float]]:
+        """查找语义相近的已缓存查询
+
+        Args:
+            scope: 作用域，不同引擎/方法/选项的结果互不复用
+            query: 查询字符串
+            vector: embed 返回的查询向量
+
+        Returns:
+            (缓存结果, 命中的原查询, 相似度)，未命中时返回None
+        """
+        import numpy as np
+
+        with self._lock:
+            index = self._scopes.get(scope)
+            if index is not None and index.ids:
+                self._prune(scope, index, vector.shape[0])
+            if index is None or not index.ids:
+                self.stats["misses"] += 1
+                return None
+            similarities = index.matrix @ vector
+            best = int(np.argmax(similarities))
+            similarity = float(similarities[best])
+            if similarity < self.threshold:
+                self.stats["misses"] += 1
+                return None
+            self.stats["hits"] += 1
+            return self._values[index.ids[best]], index.queries[best], similarity
+
+    def set(self, scope: str, query: str, vector: Any, value: Dict[str, Any]) -> None:
+        """写入一条缓存
+
+        Args:
+            scope: 作用域
+            query: 查询字符串
+            vector: embed 返回的查询向量
+            value: 搜索结果（需要可JSON序列化）
+        """
+        now = time.time()
+        with self._lock:
+            row_id = self._next_id
+            self._next_id += 1
+            self._scopes.setdefault(scope, _ScopeIndex()).add(row_id, query, vector, now)
+            self._values[row_id] = value
+            self.stats["sets"] += 1
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT INTO semantic_cache (id, scope, query, embedding, value, created_at, model) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (row_id, scope, query, vector.astype("float32").tobytes(),
+                     json.dumps(value, ensure_ascii=False, default=str), now, self.model),
+                )
+                self._conn.commit()
+            self._evict()
+
+    def _prune(self, scope: str, index: _ScopeIndex, dimension: int) -> None:
+        """删除作用域内维度与查询向量不同（其他模型生成）或已过期的条目，并构建矩阵（需持有锁）"""
+        import numpy as np
+
+        if index.matrix is None or index.matrix.shape[1] != dimension:
+            mismatched = [position for position, vector in enumerate(index.vectors) if vector.shape[0] != dimension]
+            if mismatched:
+                self._delete(scope, mismatched)
+            if not index.ids:
+                return
+            index.matrix = np.vstack(index.vectors)
+            index.created = np.asarray(index.created_at)
+        # 先排除过期条目再取最相似的，避免过期的最佳匹配挡住未过期的次佳匹配
+        expired = np.flatnonzero(index.created < time.time() - self.ttl)
+        if expired.size:
+            self._delete(scope, expired.tolist())
+            if index.ids:
+                index.matrix = np.vstack(index.vectors)
+                index.created = np.asarray(index.created_at)
+
+    def _delete(self, scope: str, positions: List[int]) -> None:
+        """删除作用域内指定位置的条目（需持有锁）"""
+        index = self._scopes[scope]
+        row_ids = [index.ids[position] for position in positions]
+        index.remove(positions)
+        for row_id in row_ids:
+            self._values.pop(row_id, None)
+        if self._conn is not None:
+            self._conn.executemany("DELETE FROM semantic_cache WHERE id = ?", [(row_id,) for row_id in row_ids])
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        """超出上限时淘汰最早写入的条目（需持有锁）"""
+        overflow = len(self._values) - self.max_entries
+        if overflow <= 0:
+            return
+        oldest = sorted(
+            (created_at, scope, position)
+            for scope, index in self._scopes.items()
+            for position, created_at in enumerate(index.created_at)
+        )[:overflow]
+        by_scope: Dict[str, List[int]] = {}
+        for _, scope, position in oldest:
+            by_scope.setdefault(scope, []).append(position)
+        for scope, positions in by_scope.items():
+            self._delete(scope, positions)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取命中统计"""
+        with self._lock:
+            stats = dict(self.stats)
+            lookups = stats["hits"] + stats["misses"]
+            stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+            stats["entries"] = len(self._values)
+            return stats
+
+    def close(self) -> None:
+        """关闭数据库连接"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
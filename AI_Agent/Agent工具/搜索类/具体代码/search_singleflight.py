@@ -0,0 +1,87 @@
+from __future__ import annotations
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+
+class SingleFlight:
+    """在途请求合并（single-flight）
+
+    相同键的并发调用只执行一次，其余调用方等待同一个结果。
+    同步调用（多线程）与异步调用（同一事件循环内的多个协程）分别合并。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, Future] = {}
+        self._async_calls: Dict[Tuple[int, str], asyncio.Task] = {}
+        self.stats = {"calls": 0, "executed": 0, "saved": 0}
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """执行fn，如果相同键的调用正在进行则等待其结果
+
+        Args:
+            key: 合并键
+            fn: 实际执行的函数
+
+        Returns:
+            fn的返回值（异常同样会传递给所有等待者）
+        """
+        with self._lock:
+            self.stats["calls"] += 1
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+                self.stats["executed"] += 1
+            else:
+                self.stats["saved"] += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    async def ado(self, key: str, afn: Callable[[], Awaitable[Any]]) -> Any:
+        """do 的异步版本
+
+        共享的请求在独立任务中执行，某个调用方被取消不会影响其他等待者。
+
+        Args:
+            key: 合并键
+            afn: 返回可等待对象的函数
+
+        Returns:
+            afn的结果
+        """
+        loop_key = (id(asyncio.get_running_loop()), key)
+        with self._lock:
+            self.stats["calls"] += 1
+            task = self._async_calls.get(loop_key)
+            if task is None:
+                task = asyncio.ensure_future(afn())
+                self._async_calls[loop_key] = task
+                task.add_done_callback(lambda _: self._async_calls.pop(loop_key, None))
+                self.stats["executed"] += 1
+            else:
+                self.stats["saved"] += 1
+        return await asyncio.shield(task)
+
+    def get_stats(self) -> Dict[str, int]:
+        """获取合并统计：calls 为总调用数，executed 为实际执行数，saved 为节省的调用数"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats["in_flight"] = len(self._calls) + len(self._async_calls)
+            return stats
@@ -0,0 +1,292 @@
+from __future__ import annotations
+import asyncio
+import threading
+import time
+import weakref
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+from .search_hit import json_loads
+
+
+class HttpTransport:
+    """同步HTTP传输层，所有搜索引擎共享同一个连接池
+
+    - 默认基于 requests.Session + HTTPAdapter，连接保持（keep-alive）并按主机划分连接池
+    - http2=True 时改用 httpx.Client（需要安装 httpx[http2]），此时连接池上限按全局计算
+    - 所有请求都带有连接/读取超时
+    """
+
+    def __init__(self,
+                 pool_connections: int = 10,
+                 pool_maxsize: int = 20,
+                 host_pool_sizes: Optional[Dict[str, int]] = None,
+                 connect_timeout: float = 5.0,
+                 read_timeout: float = 30.0,
+                 http2: bool = False):
+        """初始化同步传输层
+
+        Args:
+            pool_connections: 缓存的主机连接池数量
+            pool_maxsize: 每个主机连接池的默认最大连接数
+            host_pool_sizes: 按主机覆盖连接池大小，例如 {"s.jina.ai": 50}
+            connect_timeout: 建立连接超时时间（秒）
+            read_timeout: 读取响应超时时间（秒）
+            http2: 是否启用HTTP/2
+        """
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.host_pool_sizes = dict(host_pool_sizes or {})
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.http2 = http2
+        self._lock = threading.Lock()
+        self._session = None
+        self._adapters: Dict[str, Any] = {}
+        self._host_stats: Dict[str, Dict[str, float]] = {}
+        # 可选的指标收集器（SearchMetrics），记录按主机接收的字节数
+        self.metrics = None
+
+    def _get_session(self):
+        """懒加载底层会话"""
+        if self._session is not None:
+            return self._session
+        with self._lock:
+            if self._session is not None:
+                return self._session
+            if self.http2:
+                import httpx
+
+                max_size = max([self.pool_maxsize, *self.host_pool_sizes.values()])
+                self._session = httpx.Client(
+                    http2=True,
+                    limits=httpx.Limits(
+                        max_connections=max_size * self.pool_connections,
+                        max_keepalive_connections=max_size,
+                    ),
+                    timeout=httpx.Timeout(self.read_timeout, connect=self.connect_timeout),
+                )
+            else:
+                import requests
+                from requests.adapters import HTTPAdapter
+
+                session = requests.Session()
+                default_adapter = HTTPAdapter(pool_connections=self.pool_connections, pool_maxsize=self.pool_maxsize)
+                session.mount("https://", default_adapter)
+                session.mount("http://", default_adapter)
+                self._adapters["*"] = default_adapter
+                for host, size in self.host_pool_sizes.items():
+                    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=size)
+                    session.mount(f"https://{host}", adapter)
+                    session.mount(f"http://{host}", adapter)
+                    self._adapters[host] = adapter
+                self._session = session
+            return self._session
+
+    def post_json(self, url: str, headers: Dict[str, str], payload: Dict[str, Any], timeout: Optional[float] = None) -> Dict[str, Any]:
+        """发送JSON POST请求并解析JSON响应
+
+        Args:
+            url: 请求地址
+            headers: 请求头
+            payload: 请求体
+            timeout: 本次请求的读取超时（秒），为None时使用 read_timeout
+
+        Returns:
+            响应JSON
+
+        Raises:
+            requests.HTTPError / httpx.HTTPStatusError: 响应状态码非2xx时
+        """
+        session = self._get_session()
+        host = urlsplit(url).netloc
+        read_timeout = timeout if timeout is not None else self.read_timeout
+        start = time.perf_counter()
+        try:
+            if self.http2:
+                import httpx
+
+                response = session.post(
+                    url, headers=headers, json=payload,
+                    timeout=httpx.Timeout(read_timeout, connect=self.connect_timeout),
+                )
+            else:
+                response = session.post(
+                    url, headers=headers, json=payload,
+                    timeout=(self.connect_timeout, read_timeout),
+                )
+            response.raise_for_status()
+            result = json_loads(response.content)
+        except Exception:
+            self._record(host, time.perf_counter() - start, 0, error=True)
+            raise
+        self._record(host, time.perf_counter() - start, len(response.content))
+        return result
+
+    def _record(self, host: str, elapsed: float, size: int, error: bool = False) -> None:
+        """记录按主机统计的请求信息"""
+        with self._lock:
+            stats = self._host_stats.setdefault(
+                host, {"requests": 0, "errors": 0, "bytes_received": 0, "total_time": 0.0}
+            )
+            stats["requests"] += 1
+            stats["errors"] += int(error)
+            stats["bytes_received"] += size
+            stats["total_time"] += elapsed
+        if self.metrics is not None and size:
+            self.metrics.record_bytes(host, size)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取连接池统计信息
+
+        Returns:
+            包含按主机请求统计（hosts）和底层连接池状态（pools）的字典，
+            pools 中 num_connections 为新建连接数，num_requests 为经过该连接池的请求数，
+            两者差值即为连接复用节省的握手次数
+        """
+        with self._lock:
+            hosts = {
+                host: dict(stats, avg_time=stats["total_time"] / stats["requests"] if stats["requests"] else 0.0)
+                for host, stats in self._host_stats.items()
+            }
+        pools = {}
+        for adapter in self._adapters.values():
+            manager = adapter.poolmanager
+            for key in list(manager.pools.keys()):
+                pool = manager.pools.get(key)
+                if pool is None:
+                    continue
+                pools[f"{pool.scheme}://{pool.host}:{pool.port}"] = {
+                    "num_connections": pool.num_connections,
+                    "num_requests": pool.num_requests,
+                    "idle": pool.pool.qsize() if pool.pool is not None else 0,
+                    "maxsize": pool.pool.maxsize if pool.pool is not None else 0,
+                }
+        return {"http2": self.http2, "hosts": hosts, "pools": pools}
+
+    def close(self) -> None:
+        """关闭连接池"""
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+                self._adapters.clear()
+
+
+class AsyncHttpTransport:
+    """基于 httpx.AsyncClient 的异步HTTP传输层
+
+    - 连接池在多次调用之间复用（keep-alive），不再每个请求占用一个线程
+    - 每个事件循环各有一个客户端（按循环弱引用保存），多线程各自的事件循环互不影响；
+      asyncio.run 等正常关闭事件循环时，客户端随之关闭，不会遗留连接池
+    """
+
+    def __init__(self,
+                 max_connections: int = 200,
+                 max_keepalive_connections: int = 50,
+                 keepalive_expiry: float = 30.0,
+                 timeout: float = 30.0,
+                 connect_timeout: float = 10.0):
+        """初始化异步传输层
+
+        Args:
+            max_connections: 连接池最大连接数
+            max_keepalive_connections: 保持空闲的最大连接数
+            keepalive_expiry: 空闲连接保持时间（秒）
+            timeout: 读取/写入超时时间（秒）
+            connect_timeout: 建立连接超时时间（秒）
+        """
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        # 事件循环 -> (客户端, 关闭守卫)，事件循环被回收后条目自动删除
+        self._clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, tuple]" = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        # 可选的指标收集器（SearchMetrics），记录按主机接收的字节数
+        self.metrics = None
+
+    async def _get_client(self):
+        """获取当前事件循环对应的 httpx.AsyncClient，不存在时创建"""
+        import httpx
+
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            entry = self._clients.get(loop)
+            # 客户端引用着所属事件循环，弱引用无法自动释放，已关闭的事件循环在此清理
+            for closed in [other for other in self._clients if other.is_closed()]:
+                del self._clients[closed]
+        if entry is not None:
+            return entry[0]
+        client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive_connections,
+                keepalive_expiry=self.keepalive_expiry,
+            ),
+            timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout),
+        )
+        # 借助异步生成器的关闭钩子：事件循环执行 shutdown_asyncgens（asyncio.run 结束时）会关闭守卫，
+        # 守卫在 finally 中关闭客户端
+        guard = _close_on_loop_shutdown(client)
+        await guard.__anext__()
+        with self._lock:
+            existing = self._clients.get(loop)
+            if existing is None:
+                self._clients[loop] = (client, guard)
+        if existing is not None:
+            # 并发创建时保留先写入的客户端
+            await guard.aclose()
+            return existing[0]
+        return client
+
+    async def post_json(self, url: str, headers: Dict[str, str], payload: Dict[str, Any]) -> Dict[str, Any]:
+        """发送JSON POST请求并解析JSON响应
+
+        Args:
+            url: 请求地址
+            headers: 请求头
+            payload: 请求体
+
+        Returns:
+            响应JSON
+
+        Raises:
+            httpx.HTTPStatusError: 响应状态码非2xx时
+        """
+        client = await self._get_client()
+        response = await client.post(url, headers=headers, json=payload)
+        response.raise_for_status()
+        if self.metrics is not None:
+            self.metrics.record_bytes(urlsplit(url).netloc, len(response.content))
+        return json_loads(response.content)
+
+    async def conditional_get(self, url: str, headers: Dict[str, str]) -> Tuple[int, Optional[str], Optional[str]]:
+        """发送条件GET请求，只读取响应头，不下载正文
+
+        Args:
+            url: 请求地址
+            headers: 请求头，通常包含 If-None-Match / If-Modified-Since
+
+        Returns:
+            (状态码, ETag, Last-Modified)
+        """
+        client = await self._get_client()
+        async with client.stream("GET", url, headers=headers, follow_redirects=True) as response:
+            return response.status_code, response.headers.get("etag"), response.headers.get("last-modified")
+
+    async def aclose(self) -> None:
+        """关闭当前事件循环的连接池"""
+        with self._lock:
+            entry = self._clients.pop(asyncio.get_running_loop(), None)
+        if entry is not None:
+            await entry[1].aclose()
+
+
+async def _close_on_loop_shutdown(client: Any):
+    """挂起直到被关闭（显式调用或事件循环的 shutdown_asyncgens），然后关闭客户端"""
+    try:
+        yield
+    finally:
+        await client.aclose()
@@ -28,7 +28,7 @@ load_dotenv()
 
 # 创建LLM和搜索引擎
 llm_deepseek = LLMFactory.create_llm(LLMProviderType.DEEPSEEK)
-search_tavily = SearchEngineFactory.create_engine(SearchEngineType.TAVILY)
+search_tavily = SearchEngineFactory.get_engine(SearchEngineType.TAVILY, archive=True)  # 搜索结果同时写入可检索的归档
 
 # ============================
 # 第1部分: 定义工具和状态类型
@@ -1,8 +1,31 @@
 
 import time
 import random
+import asyncio
+import ipaddress
+import threading
 import requests
 import logging
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+# 通过代理访问时会暴露代理身份的请求头
+PROXY_REVEALING_HEADERS = ('via', 'x-forwarded-for', 'forwarded', 'x-real-ip', 'proxy-connection', 'client-ip')
+
+
+def _parse_ips(value):
+    """
+    解析逗号分隔的IP列表（如回显服务的 origin 或 X-Forwarded-For），忽略无法解析的部分
+    
+    Returns:
+        set: IP地址集合
+    """
+    ips = set()
+    for part in str(value or '').split(','):
+        try:
+            ips.add(ipaddress.ip_address(part.strip()))
+        except ValueError:
+            pass
+    return ips
 
 # 配置日志
 logging.basicConfig(
@@ -11,16 +34,159 @@ logging.basicConfig(
 )
 logger = logging.getLogger('proxy_pool')
 
+class IndexedProxySet:
+    """
+    可随机抽取的代理集合：代理到下标的字典 + 紧凑数组
+    
+    添加、删除（与末尾元素交换后弹出）、成员判断和均匀随机抽取都是 O(1)，添加时自动去重。
+    支持 len / in / 迭代 / 下标访问，可直接用于 random.choice。
+    """
+    
+    __slots__ = ('_items', '_index')
+    
+    def __init__(self, proxies=()):
+        self._items = []
+        self._index = {}
+        self.update(proxies)
+    
+    def add(self, proxy):
+        """
+        添加代理
+        
+        Returns:
+            bool: 是否为新代理（已存在时返回False）
+        """
+        if proxy in self._index:
+            return False
+        self._index[proxy] = len(self._items)
+        self._items.append(proxy)
+        return True
+    
+    def update(self, proxies):
+        """
+        批量添加代理
+        
+        Returns:
+            int: 新增的代理数量
+        """
+        return sum(1 for proxy in proxies if self.add(proxy))
+    
+    def discard(self, proxy):
+        """
+        移除代理（把末尾元素移到被删除的位置）
+        
+        Returns:
+            bool: 代理是否存在
+        """
+        slot = self._index.pop(proxy, None)
+        if slot is None:
+            return False
+        last = self._items.pop()
+        if slot < len(self._items):
+            self._items[slot] = last
+            self._index[last] = slot
+        return True
+    
+    def choice(self):
+        """均匀随机抽取一个代理，集合为空时返回None"""
+        if not self._items:
+            return None
+        return self._items[random.randrange(len(self._items))]
+    
+    def clear(self):
+        self._items.clear()
+        self._index.clear()
+    
+    def __contains__(self, proxy):
+        return proxy in self._index
+    
+    def __len__(self):
+        return len(self._items)
+    
+    def __iter__(self):
+        return iter(self._items)
+    
+    def __getitem__(self, slot):
+        return self._items[slot]
+    
+    def __repr__(self):
+        return f"IndexedProxySet({len(self._items)} proxies)"
+
+class ProxyHealth:
+    """单个代理的健康状态：EWMA延迟、EWMA成功率和最近一次失败时间"""
+    
+    __slots__ = ('latency', 'success_ratio', 'last_failure', 'consecutive_failures', 'requests')
+    
+    def __init__(self, latency=1.0):
+        """
+        初始化健康状态（新代理按成功率1.0的乐观先验，保证会被尝试）
+        
+        Args:
+            latency: 初始延迟估计（秒），通常取验证时测得的延迟
+        """
+        self.latency = latency
+        self.success_ratio = 1.0
+        self.last_failure = 0.0
+        self.consecutive_failures = 0
+        self.requests = 0
+    
+    def update(self, success, latency, alpha):
+        """
+        根据一次请求结果更新EWMA
+        
+        Args:
+            success: 请求是否成功
+            latency: 请求耗时（秒），为None时不更新延迟
+            alpha: EWMA平滑系数，越大越看重最近的结果
+        """
+        self.requests += 1
+        self.success_ratio += alpha * ((1.0 if success else 0.0) - self.success_ratio)
+        if latency is not None:
+            self.latency += alpha * (latency - self.latency)
+        if success:
+            self.consecutive_failures = 0
+        else:
+            self.consecutive_failures += 1
+            self.last_failure = time.time()
+    
+    def score(self, failure_cooldown):
+        """
+        代理得分（越高越好）：成功率 / 延迟，冷却期内刚失败过的代理得分减半
+        
+        Args:
+            failure_cooldown: 失败冷却时间（秒）
+        """
+        score = self.success_ratio / max(self.latency, 0.001)
+        if time.time() - self.last_failure < failure_cooldown:
+            score *= 0.5
+        return score
+
 class ProxyPool:
     """代理池管理类，用于获取、管理和轮换HTTP代理"""
     
-    def __init__(self, change_interval=60, use_proxy=True):
+    def __init__(self, change_interval=60, use_proxy=True, fetch_timeout=10, fetch_deadline=15, fetch_grace=1.0,
+                 validate_on_refresh=False, validate_url="http://httpbin.org/get",
+                 validate_https_url="https://httpbin.org/get", validate_concurrency=200, validate_timeout=5,
+                 refresh_interval=600, health_alpha=0.3, failure_cooldown=30, max_consecutive_failures=5):
         """
         初始化代理池
         
         Args:
             change_interval: 更换代理的时间间隔（秒）
             use_proxy: 是否使用代理
+            fetch_timeout: 单个代理来源的连接/读取超时时间（秒）
+            fetch_deadline: 一次刷新代理列表的总时限（秒）
+            fetch_grace: 第一个来源成功后继续等待其他来源的时间（秒）
+            validate_on_refresh: 刷新代理列表后是否批量验证，只保留验证通过的代理
+            validate_url: 验证用的HTTP回显地址，需返回 {"origin": 来源IP, "headers": 请求头} 格式的JSON
+                （如 httpbin 的 /get 或本地回显服务）
+            validate_https_url: 验证HTTPS能力的地址，为None时不验证HTTPS
+            validate_concurrency: 批量验证的最大并发数
+            validate_timeout: 单个代理验证的超时时间（秒）
+            refresh_interval: 重新获取代理列表的时间间隔（秒），更换代理时只在超过该间隔或代理池为空时刷新
+            health_alpha: 代理健康状态EWMA的平滑系数
+            failure_cooldown: 代理失败后降低其选中概率的时间（秒）
+            max_consecutive_failures: 连续失败达到该次数时从代理池中移除，为0时不移除
         """
         # 免费代理API来源
         self.free_proxy_apis = [
@@ -34,8 +200,8 @@ class ProxyPool:
         # 手动代理列表
         self.manual_proxy_list = []
         
-        # 当前可用的代理列表
-        self.available_proxies = []
+        # 当前可用的代理集合
+        self._available_proxies = IndexedProxySet()
         
         # 当前正在使用的代理
         self.current_proxy = None
@@ -46,8 +212,50 @@ class ProxyPool:
         # 更换代理的时间间隔（秒）
         self.change_interval = change_interval
         
+        # 重新获取代理列表的时间间隔（秒）和上次获取的时间
+        self.refresh_interval = refresh_interval
+        self.last_refresh_time = 0
+        
         # 是否使用代理
         self.use_proxy = use_proxy
+        
+        # 获取代理列表的超时设置
+        self.fetch_timeout = fetch_timeout
+        self.fetch_deadline = fetch_deadline
+        self.fetch_grace = fetch_grace
+        
+        # 代理验证设置
+        self.validate_on_refresh = validate_on_refresh
+        self.validate_url = validate_url
+        self.validate_https_url = validate_https_url
+        self.validate_concurrency = validate_concurrency
+        self.validate_timeout = validate_timeout
+        
+        # 最近一次验证结果，键为代理URL
+        self.proxy_checks = {}
+        
+        # 代理健康状态，由 report_result 更新，键为代理URL
+        self.health_alpha = health_alpha
+        self.failure_cooldown = failure_cooldown
+        self.max_consecutive_failures = max_consecutive_failures
+        self.proxy_health = {}
+        # 保护可用代理集合、健康状态和当前代理（可重入：report_result 持锁时会调用 remove_proxy）
+        self._lock = threading.RLock()
+    
+    @property
+    def available_proxies(self):
+        """当前可用的代理集合（IndexedProxySet）"""
+        return self._available_proxies
+    
+    @available_proxies.setter
+    def available_proxies(self, proxies):
+        # 兼容直接赋值列表的用法，赋值时去重
+        proxies = proxies if isinstance(proxies, IndexedProxySet) else IndexedProxySet(proxies)
+        with self._lock:
+            self._available_proxies = proxies
+            # 清理已不在代理池中的代理的健康状态
+            for proxy in [p for p in self.proxy_health if p not in proxies and p != self.current_proxy]:
+                del self.proxy_health[proxy]
     
     def add_manual_proxy(self, proxy):
         """
@@ -66,62 +274,245 @@ class ProxyPool:
         self.manual_proxy_list = []
         logger.info("已清空手动代理列表")
     
-    def get_proxy_list(self):
+    @staticmethod
+    def _parse_proxy_line(line):
         """
-        从多个来源获取代理列表
+        解析代理来源中的一行
         
+        Args:
+            line: 一行文本（str 或 bytes）
+            
         Returns:
-            list: 代理列表
+            str: 带协议前缀的代理URL，格式不正确时返回None
         """
-        proxy_list = []
+        if isinstance(line, bytes):
+            line = line.decode('utf-8', errors='ignore')
+        proxy = line.strip()
+        if not proxy or ':' not in proxy:  # 确保代理格式正确
+            return None
+        # 如果代理没有协议前缀，添加http://
+        if not proxy.startswith('http'):
+            proxy = f"http://{proxy}"
+        return proxy
+    
+    def _merge_proxies(self, lines, merged, lock):
+        """
+        解析多行代理并合并到 merged 中
         
+        Returns:
+            int: 解析出的代理数量
+        """
+        proxies = [proxy for proxy in map(self._parse_proxy_line, lines) if proxy]
+        if proxies:
+            with lock:
+                merged.update(dict.fromkeys(proxies))
+        return len(proxies)
+    
+    def _fetch_proxy_source(self, api_url, merged, lock, stop_event):
+        """
+        流式读取一个代理来源，边下载边解析并合并到 merged 中
+        
+        Args:
+            api_url: 代理来源URL
+            merged: 合并结果（dict，键为代理URL，用于去重并保持顺序）
+            lock: 保护 merged 的锁
+            stop_event: 刷新结束后被设置，用于提前停止读取
+            
+        Returns:
+            int: 从该来源解析出的代理数量
+        """
+        count = 0
+        with requests.get(api_url, timeout=self.fetch_timeout, stream=True) as response:
+            response.raise_for_status()
+            remainder = b''
+            # 按网络分块读取，每块解析出的完整行立即合并，超时截止时已到达的部分不会丢失
+            for chunk in response.iter_content(chunk_size=4096):
+                if stop_event.is_set():
+                    break
+                lines = (remainder + chunk).split(b'\n')
+                remainder = lines.pop()
+                count += self._merge_proxies(lines, merged, lock)
+            else:
+                count += self._merge_proxies([remainder], merged, lock)
+        return count
+    
+    def _collect_proxies(self):
+        """
+        从多个来源并发获取代理并去重合并（不更新可用代理集合）
+        
+        所有来源同时流式下载解析。第一个来源成功后只再等待 fetch_grace 秒，
+        整体不超过 fetch_deadline 秒，未完成的来源已下载的部分也会保留。
+        
+        Returns:
+            list: 代理列表（手动代理在前）
+        """
         # 首先添加手动代理列表
-        proxy_list.extend(self.manual_proxy_list)
+        merged = dict.fromkeys(self.manual_proxy_list)
+        
+        # 如果不使用代理，直接返回手动代理列表
+        if not self.use_proxy:
+            return list(merged)
+        
+        lock = threading.Lock()
+        stop_event = threading.Event()
+        deadline = time.monotonic() + self.fetch_deadline
+        executor = ThreadPoolExecutor(max_workers=max(1, len(self.free_proxy_apis)), thread_name_prefix='proxy-source')
+        try:
+            pending = {
+                executor.submit(self._fetch_proxy_source, api_url, merged, lock, stop_event): api_url
+                for api_url in self.free_proxy_apis
+            }
+            while pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                done, _ = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+                for future in done:
+                    api_url = pending.pop(future)
+                    try:
+                        count = future.result()
+                        logger.info(f"从 {api_url} 获取了 {count} 个代理")
+                        # 已有健康来源，其余来源最多再等待 fetch_grace 秒
+                        deadline = min(deadline, time.monotonic() + self.fetch_grace)
+                    except Exception as e:
+                        logger.error(f"从 {api_url} 获取代理失败: {e}")
+            for api_url in pending.values():
+                logger.warning(f"从 {api_url} 获取代理超时，仅保留已下载的部分")
+        finally:
+            stop_event.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+        
+        with lock:
+            return list(merged)
+    
+    def get_proxy_list(self):
+        """
+        从多个来源并发获取代理列表，并更新可用代理集合
+        
+        启用 validate_on_refresh 时只有验证通过的代理进入可用代理集合。
+        
+        Returns:
+            list: 代理列表（启用验证时为验证通过的代理）
+        
+        Raises:
+            RuntimeError: 在运行中的事件循环里调用时（应使用 await aget_proxy_list()）
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            raise RuntimeError("不能在运行中的事件循环里调用 get_proxy_list，请使用 await aget_proxy_list()")
         
-        # 如果不使用代理，直接返回空列表
+        proxy_list = self._collect_proxies()
         if not self.use_proxy:
             return proxy_list
+        self.last_refresh_time = time.time()
         
-        # 然后尝试从API获取代理
-        for api_url in self.free_proxy_apis:
-            try:
-                response = requests.get(api_url, timeout=10)
-                if response.status_code == 200:
-                    # 解析代理列表（假设每行一个代理）
-                    api_proxies = response.text.strip().split('\n')
-                    valid_proxies = []
-                    for proxy in api_proxies:
-                        if proxy and ':' in proxy:  # 确保代理格式正确
-                            # 如果代理没有协议前缀，添加http://
-                            if not proxy.startswith('http'):
-                                proxy = f"http://{proxy}"
-                            valid_proxies.append(proxy)
-                    proxy_list.extend(valid_proxies)
-                    logger.info(f"从 {api_url} 获取了 {len(valid_proxies)} 个代理")
-            except Exception as e:
-                logger.error(f"从 {api_url} 获取代理失败: {e}")
+        if self.validate_on_refresh:
+            # validate_proxies 会把验证通过的代理设为可用代理集合
+            return self.validate_proxies(proxy_list)
+        
+        self._set_available(proxy_list)
+        return proxy_list
+    
+    async def aget_proxy_list(self):
+        """
+        get_proxy_list 的异步版本：在线程中获取代理，需要验证时等待验证完成
+        
+        Returns:
+            list: 代理列表（启用验证时为验证通过的代理）
+        """
+        proxy_list = await asyncio.to_thread(self._collect_proxies)
+        if not self.use_proxy:
+            return proxy_list
+        self.last_refresh_time = time.time()
         
-        # 更新可用代理列表
+        if self.validate_on_refresh:
+            return await self.avalidate_proxies(proxy_list)
+        
+        self._set_available(proxy_list)
+        return proxy_list
+    
+    def _set_available(self, proxy_list):
+        """用新获取的代理列表替换可用代理集合"""
         self.available_proxies = proxy_list
         logger.info(f"代理池中共有 {len(proxy_list)} 个代理")
-        return proxy_list
+    
+    def _get_health(self, proxy):
+        """获取代理的健康状态，不存在时以验证延迟（如有）为初始值创建（需持有 _lock）"""
+        health = self.proxy_health.get(proxy)
+        if health is None:
+            check = self.proxy_checks.get(proxy)
+            latency = check["latency"] if check and check.get("latency") is not None else 1.0
+            health = self.proxy_health[proxy] = ProxyHealth(latency)
+        return health
+    
+    def report_result(self, proxy, success, latency=None):
+        """
+        反馈一次通过代理发出的请求结果，爬虫每次请求后调用
+        
+        Args:
+            proxy: 使用的代理URL
+            success: 请求是否成功
+            latency: 请求耗时（秒）
+        """
+        if not proxy:
+            return
+        with self._lock:
+            if proxy not in self.available_proxies and proxy != self.current_proxy:
+                # 代理已被移除（可能是其他线程），不再记录其健康状态
+                return
+            health = self._get_health(proxy)
+            health.update(success, latency, self.health_alpha)
+            if 0 < self.max_consecutive_failures <= health.consecutive_failures:
+                logger.warning(f"代理 {proxy} 连续失败 {health.consecutive_failures} 次")
+                self.remove_proxy(proxy)
+    
+    def get_proxy_health(self, proxy):
+        """
+        获取代理的健康状态
+        
+        Args:
+            proxy: 代理URL
+            
+        Returns:
+            dict: 延迟、成功率、最近失败时间等，没有记录时返回None
+        """
+        with self._lock:
+            health = self.proxy_health.get(proxy)
+            if health is None:
+                return None
+            return {
+                "latency": health.latency,
+                "success_ratio": health.success_ratio,
+                "last_failure": health.last_failure,
+                "consecutive_failures": health.consecutive_failures,
+                "requests": health.requests,
+                "score": health.score(self.failure_cooldown),
+            }
     
     def select_random_proxy(self):
         """
-        从代理列表中随机选择一个
+        从代理列表中按健康状态加权选择一个（二选一：随机抽取两个代理，选得分高的）
         
         Returns:
             str: 选择的代理URL
         """
         if not self.available_proxies:
-            # 如果没有可用代理，尝试重新获取
-            self.available_proxies = self.get_proxy_list()
-        
-        if not self.available_proxies:
-            logger.warning("代理列表为空，无法选择代理")
-            return None
+            # 如果没有可用代理，尝试重新获取（get_proxy_list 会更新可用代理集合）
+            self.get_proxy_list()
         
-        proxy = random.choice(self.available_proxies)
+        with self._lock:
+            if not self.available_proxies:
+                logger.warning("代理列表为空，无法选择代理")
+                return None
+            
+            first = self.available_proxies.choice()
+            second = self.available_proxies.choice()
+            if self._get_health(second).score(self.failure_cooldown) > self._get_health(first).score(self.failure_cooldown):
+                first = second
+        proxy = first
         logger.info(f"选择代理: {proxy}")
         return proxy
     
@@ -148,16 +539,46 @@ class ProxyPool:
         
         # 如果是首次使用代理或者已经超过更换间隔
         if self.current_proxy is None or (current_time - self.last_change_time) >= self.change_interval:
-            proxy_list = self.get_proxy_list()
-            if proxy_list:
+            # 代理池为空或超过刷新间隔时才重新获取代理列表
+            if self._needs_refresh(current_time):
+                self.get_proxy_list()
+            self._switch_proxy(current_time)
+        
+        return self.current_proxy
+    
+    async def achange_proxy_if_needed(self):
+        """
+        change_proxy_if_needed 的异步版本，需要刷新时使用 aget_proxy_list，不阻塞事件循环
+        
+        Returns:
+            str: 当前代理URL，如果更换了代理则返回新代理
+        """
+        if not self.use_proxy:
+            return None
+        
+        current_time = time.time()
+        
+        if self.current_proxy is None or (current_time - self.last_change_time) >= self.change_interval:
+            if self._needs_refresh(current_time):
+                await self.aget_proxy_list()
+            self._switch_proxy(current_time)
+        
+        return self.current_proxy
+    
+    def _needs_refresh(self, current_time):
+        """代理池为空或超过刷新间隔时需要重新获取代理列表"""
+        return not self.available_proxies or (current_time - self.last_refresh_time) >= self.refresh_interval
+    
+    def _switch_proxy(self, current_time):
+        """从可用代理集合中选择新的当前代理，代理池为空时不使用代理"""
+        with self._lock:
+            if self.available_proxies:
                 self.current_proxy = self.select_random_proxy()
                 self.last_change_time = current_time
                 logger.info(f"代理已更换为: {self.current_proxy}")
             else:
                 logger.warning("无法获取代理列表，将不使用代理")
                 self.current_proxy = None
-        
-        return self.current_proxy
     
     def get_playwright_proxy_config(self, proxy):
         """
@@ -212,6 +633,148 @@ class ProxyPool:
             logger.warning(f"代理 {proxy} 测试失败: {e}")
             return False
     
+    async def _check_proxy(self, session, proxy, real_ips, semaphore):
+        """
+        验证单个代理：连通性与延迟、匿名度、HTTPS能力
+        
+        Args:
+            session: aiohttp.ClientSession
+            proxy: 代理URL
+            real_ips: 不经代理时的出口IP集合，用于判断是否为透明代理
+            semaphore: 控制并发数的信号量
+            
+        Returns:
+            dict: 验证结果
+        """
+        result = {"proxy": proxy, "ok": False, "latency": None, "anonymity": None,
+                  "https": None, "error": None, "checked_at": time.time()}
+        async with semaphore:
+            try:
+                start = time.perf_counter()
+                async with session.get(self.validate_url, proxy=proxy) as response:
+                    if response.status != 200:
+                        result["error"] = f"HTTP {response.status}"
+                        return result
+                    try:
+                        echo = await response.json(content_type=None)
+                    except ValueError:
+                        echo = None
+                result["latency"] = time.perf_counter() - start
+            except Exception as e:
+                result["error"] = f"{type(e).__name__}: {e}"
+                return result
+            
+            # 目标看到的来源IP：origin 以及代理转发头中的IP，逐个精确比较
+            seen_ips = _parse_ips(echo.get("origin")) if isinstance(echo, dict) else set()
+            if not seen_ips:
+                # 回显不是验证地址的JSON（如强制门户或劫持页面返回的200页面），视为不可用
+                result["error"] = "invalid echo"
+                return result
+            result["ok"] = True
+            
+            # 根据回显的来源IP和请求头判断匿名度
+            headers = echo.get("headers")
+            headers = {str(k).lower(): v for k, v in headers.items()} if isinstance(headers, dict) else {}
+            for name in ('x-forwarded-for', 'x-real-ip', 'client-ip'):
+                seen_ips |= _parse_ips(headers.get(name))
+            if real_ips and real_ips & seen_ips:
+                result["anonymity"] = "transparent"
+            elif any(name in headers for name in PROXY_REVEALING_HEADERS):
+                result["anonymity"] = "anonymous"
+            else:
+                result["anonymity"] = "elite"
+            
+            if self.validate_https_url:
+                try:
+                    async with session.get(self.validate_https_url, proxy=proxy) as response:
+                        result["https"] = response.status == 200
+                except Exception:
+                    result["https"] = False
+        return result
+    
+    async def avalidate_proxies(self, proxies=None, require_https=False, require_anonymous=False, promote=True):
+        """
+        异步批量验证代理，并发数由 validate_concurrency 限制
+        
+        Args:
+            proxies: 要验证的代理列表，为None时验证当前可用代理列表
+            require_https: 是否要求支持HTTPS
+            require_anonymous: 是否排除透明代理
+            promote: 是否把验证通过的代理设为可用代理列表
+            
+        Returns:
+            list: 验证通过的代理，按延迟从低到高排列
+        """
+        import aiohttp
+        
+        proxies = list(dict.fromkeys(self.available_proxies if proxies is None else proxies))
+        if not proxies:
+            return []
+        
+        timeout = aiohttp.ClientTimeout(total=self.validate_timeout)
+        # 保持证书校验：拦截TLS的代理无法通过HTTPS检测
+        connector = aiohttp.TCPConnector(limit=self.validate_concurrency, force_close=True)
+        semaphore = asyncio.Semaphore(self.validate_concurrency)
+        async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
+            # 先获取本机出口IP，用于识别透明代理
+            real_ips = None
+            try:
+                async with session.get(self.validate_url) as response:
+                    echo = await response.json(content_type=None)
+                    real_ips = _parse_ips(echo.get("origin")) if isinstance(echo, dict) else None
+            except Exception as e:
+                logger.warning(f"获取本机出口IP失败，无法识别透明代理: {e}")
+            
+            start = time.perf_counter()
+            results = await asyncio.gather(*(self._check_proxy(session, proxy, real_ips, semaphore) for proxy in proxies))
+        
+        passed = []
+        for result in results:
+            self.proxy_checks[result["proxy"]] = result
+            if not result["ok"]:
+                continue
+            if require_https and not result["https"]:
+                continue
+            if require_anonymous and result["anonymity"] == "transparent":
+                continue
+            passed.append(result)
+        passed.sort(key=lambda r: r["latency"])
+        passed_proxies = [r["proxy"] for r in passed]
+        logger.info(f"验证了 {len(proxies)} 个代理，{len(passed_proxies)} 个通过，耗时 {time.perf_counter() - start:.1f} 秒")
+        
+        if promote:
+            with self._lock:
+                if self.current_proxy is not None and self.current_proxy not in passed_proxies:
+                    # 当前代理不在验证通过的代理中，下次立即更换
+                    self.current_proxy = None
+                    self.last_change_time = 0
+                self.available_proxies = passed_proxies
+        return passed_proxies
+    
+    def validate_proxies(self, proxies=None, require_https=False, require_anonymous=False, promote=True):
+        """
+        批量验证代理（avalidate_proxies 的同步版本）
+        
+        Args:
+            proxies: 要验证的代理列表，为None时验证当前可用代理列表
+            require_https: 是否要求支持HTTPS
+            require_anonymous: 是否排除透明代理
+            promote: 是否把验证通过的代理设为可用代理列表
+            
+        Returns:
+            list: 验证通过的代理，按延迟从低到高排列
+        
+        Raises:
+            RuntimeError: 在运行中的事件循环里调用时（应使用 await avalidate_proxies(...)）
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            raise RuntimeError("不能在运行中的事件循环里调用 validate_proxies，请使用 await avalidate_proxies(...)")
+        return asyncio.run(self.avalidate_proxies(proxies, require_https, require_anonymous, promote))
+    
     def remove_proxy(self, proxy):
         """
         从可用代理列表中移除指定代理
@@ -219,11 +782,13 @@ class ProxyPool:
         Args:
             proxy: 要移除的代理URL
         """
-        if proxy in self.available_proxies:
-            self.available_proxies.remove(proxy)
-            logger.info(f"已从代理池中移除代理: {proxy}")
-            
-            # 如果移除的是当前代理，则更新当前代理
-            if proxy == self.current_proxy:
-                self.current_proxy = None
-                self.last_change_time = 0  # 重置时间，以便下次立即更换
\ No newline at end of file
+        with self._lock:
+            removed = self.available_proxies.discard(proxy)
+            self.proxy_health.pop(proxy, None)
+            if removed:
+                logger.info(f"已从代理池中移除代理: {proxy}")
+                
+                # 如果移除的是当前代理，则更新当前代理
+                if proxy == self.current_proxy:
+                    self.current_proxy = None
+                    self.last_change_time = 0  # 重置时间，以便下次立即更换
\ No newline at end of file